@@ -9,22 +9,24 @@ import logging
 import os
 
 from celery_task.main import celery_app
+from main.util.artifact_cache import ArtifactCache
 
 logger = logging.getLogger(__name__)
 
 
 @celery_app.task(name="clean_file.task.clean")
-def clean(path=""):
+def clean(path="", budget=None):
+    """
+    图表缓存总大小超出上限时按 LRU/LFU 淘汰，不再删除全部文件
+    :param path: 缓存目录
+    :param budget: 总大小上限 字节，默认为 ARTIFACT_CACHE_BYTES
+    """
     try:
         if not os.path.isdir(path):
             logger.error(f"删除文件失败,目录不存在 {path}")
+            return 0
         
-        cou = 0
-        for i in os.listdir(path):
-            if i.endswith(".html"):
-                os.remove(os.path.join(path, i))
-                cou += 1
-        
+        cou = ArtifactCache(path).evict(budget)
         logger.info(f"删除文件成功，共删除文件{cou}个")
         return cou
     except Exception as e:
@@ -32,6 +32,7 @@ accept_content = ['json']
 imports = [
     "celery_task.clean_file.task",
     "celery_task.refresh_tiobe.task",
+    "celery_task.prerender_chart.task",
     ]
 
 # redis作消息中间件 只支持type='direct'，对于direct模式 routing_key可以不需要
@@ -45,6 +46,7 @@ task_queues = (
 # 注   task_routes  ],)   这里必须是个元组
 task_routes = ([
                    ('refresh_tiobe.task.refresh', {'queue': 'q1'}),
+                   ('prerender_chart.task.prerender_tiobe', {'queue': 'q1'}),
                    ('clean_file.task.clean', {'queue': 'q2'}),
                    ],)
 
@@ -66,7 +68,13 @@ beat_schedule = {
         "task": "clean_file.task.clean",  # 注册的任务名
         # "schedule": timedelta(hours=24),  # 每间隔24小时执行一次
         "schedule": timedelta(minutes=1),  # test
-        "args": (os.path.join(BASE_DIR, "dist"),)  # 任务函数参数
+        "args": (os.path.join(BASE_DIR, "dist", "artifact"),)  # 任务函数参数
         },
-        
+    "prerender_task": {
+        "task": "prerender_chart.task.prerender_tiobe",  # 注册的任务名
+        # "schedule": crontab(minute="30", hour="2"),  # 每天的2点半执行 在刷新数据之后
+        "schedule": crontab(minute="2"),  # test
+        "args": ()  # 任务函数参数
+        },
+    
     }
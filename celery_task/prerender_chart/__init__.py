@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : __init__.py
+# @Time   : 2026/10/18 23:40
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : task.py
+# @Time   : 2026/10/18 23:40
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 预生成 tiobe 各类图表写入缓存，请求时直接发送文件
+import logging
+
+from celery_task.main import celery_app
+from main.draw_chart.data_source import tiobe
+from main.draw_chart.dashboard import TIOBE_CHART_TYPES, tiobe_key, tiobe_chart
+from main.util.artifact_cache import artifact_cache
+from main.util.draw.executor import render_executor
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="prerender_chart.task.prerender_tiobe")
+def prerender_tiobe():
+    try:
+        # 数据只读取一次，celery prefork worker 中不使用进程池
+        df = tiobe.get_matrix()
+        charts = render_executor.map([(tiobe_chart, (x, df), {}) for x in TIOBE_CHART_TYPES])
+        size = sum(artifact_cache.put(tiobe_key(x), chart.render_embed()) for x, chart in zip(TIOBE_CHART_TYPES, charts))
+        
+        logger.info(f"预生成tiobe图表成功 数量:{len(charts)} 大小:{size}")
+    except Exception as e:
+        logger.error(f"预生成tiobe图表失败 {e}")
+
+
+if __name__ == '__main__':
+    prerender_tiobe()
@@ -16,9 +16,9 @@ logger = logging.getLogger(__name__)
 @celery_app.task(name="refresh_tiobe.task.refresh")
 def refresh():
     try:
-        tiobe.save(tiobe.request_tiobe())
+        count, version = tiobe.refresh()
         
-        logger.info(f"刷新tiobe数据成功")
+        logger.info(f"刷新tiobe数据成功 新增:{count} 版本:{version}")
     except Exception as e:
         logger.error(f"刷新tiobe数据失败 {e}")
 
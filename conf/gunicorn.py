@@ -16,7 +16,7 @@ bind = '0.0.0.0:5000'
 # 设置守护进程,将进程交给supervisor管理
 daemon = 'false'
 
-# 工作模式协程
+# 工作模式协程，图表进程池(RENDER_POOL_WORKERS)不可用，在当前进程生成
 worker_class = 'gevent'
 
 # 设置最大并发量
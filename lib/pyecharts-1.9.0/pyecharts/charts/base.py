@@ -1,4 +1,6 @@
 import datetime
+import itertools
+import re
 import uuid
 import warnings
 
@@ -44,14 +46,27 @@ class Base(ChartMixin):
     def get_options(self) -> dict:
         return utils.remove_key_with_none_value(self.options)
 
-    def dump_options(self) -> str:
+    def dump_options(self, pretty: Optional[bool] = None) -> str:
+        """
+        :param pretty: indented output for debugging,
+            defaults to CurrentConfig.PRETTY_OPTIONS
+        """
+        if not _pretty(pretty):
+            return encode_options(self.options)
         return utils.replace_placeholder(
             json.dumps(self.get_options(), indent=4, default=default, ignore_nan=True)
         )
 
-    def dump_options_with_quotes(self) -> str:
+    def dump_options_with_quotes(self, pretty: Optional[bool] = None) -> str:
+        if not _pretty(pretty):
+            return encode_options(self.options, js_quotes=True)
         return utils.replace_placeholder_with_quotes(
-            json.dumps(self.get_options(), indent=4, default=default, ignore_nan=True)
+            json.dumps(
+                self.get_options(),
+                indent=4,
+                default=default_with_quotes,
+                ignore_nan=True,
+            )
         )
 
     def render(
@@ -89,15 +104,109 @@ class Base(ChartMixin):
         self._use_theme()
 
 
+def _js_code(o: utils.JsCode) -> str:
+    # works on a copy so that dumping the same chart twice gives the same output
+    js_code = re.sub("\\n|\\t", "", o.js_code)
+    js_code = re.sub(r"\\n", "\n", js_code)
+    js_code = re.sub(r"\\t", "\t", js_code)
+    return js_code.replace(utils.PLACEHOLDER, "")
+
+
 def default(o):
+    # JsCode is escaped like a string but written without the surrounding quotes,
+    # same output as stripping the placeholders from the whole document
+    if isinstance(o, utils.JsCode):
+        return json.RawJSON(json.dumps(_js_code(o))[1:-1])
+    return default_with_quotes(o)
+
+
+def default_with_quotes(o):
     if isinstance(o, (datetime.date, datetime.datetime)):
         return o.isoformat()
     if isinstance(o, utils.JsCode):
-        return (
-            o.replace("\\n|\\t", "").replace(r"\\n", "\n").replace(r"\\t", "\t").js_code
-        )
+        return _js_code(o)
     if isinstance(o, BasicOpts):
         if isinstance(o.opts, Sequence):
             return [utils.remove_key_with_none_value(item) for item in o.opts]
         else:
             return utils.remove_key_with_none_value(o.opts)
+
+
+def _pretty(pretty: Optional[bool]) -> bool:
+    return CurrentConfig.PRETTY_OPTIONS if pretty is None else pretty
+
+
+_SCALARS = (str, int, float, bool, type(None))
+_SCALAR_TYPES = frozenset(_SCALARS)
+_ARRAY_TYPES = frozenset((list, tuple))
+_compact = json.JSONEncoder(ignore_nan=True, separators=(",", ":"))
+
+
+def _is_plain(array) -> bool:
+    """
+    Arrays of scalars, or of arrays of scalars such as [x, y] pairs,
+    need no cleaning and go to the C encoder as a whole.
+    """
+    types = set(map(type, array))
+    if types <= _SCALAR_TYPES:
+        return True
+    if types <= _ARRAY_TYPES:
+        return set(map(type, itertools.chain.from_iterable(array))) <= _SCALAR_TYPES
+    return False
+
+
+def _encode(o, js_quotes: bool) -> str:
+    if isinstance(o, dict):
+        items = []
+        for key, value in o.items():
+            # same rule as remove_key_with_none_value
+            if value is None or (isinstance(value, str) and not value):
+                continue
+            items.append(
+                _compact.encode(key if isinstance(key, str) else str(key))
+                + ":"
+                + _encode(value, js_quotes)
+            )
+        return "{" + ",".join(items) + "}"
+
+    if isinstance(o, (list, tuple, set)):
+        if _is_plain(o):
+            return _compact.encode(list(o) if isinstance(o, set) else o)
+        return "[" + ",".join(_encode(value, js_quotes) for value in o) + "]"
+
+    if isinstance(o, _SCALARS):
+        return _compact.encode(o)
+
+    if isinstance(o, utils.JsCode):
+        if js_quotes:
+            return _compact.encode(_js_code(o))
+        return default(o).encoded_json
+
+    if isinstance(o, BasicOpts):
+        # cleaned while encoding, same result as default()
+        if isinstance(o.opts, Sequence):
+            return _encode(
+                [item if item or isinstance(item, dict) else None for item in o.opts],
+                js_quotes,
+            )
+        if isinstance(o.opts, dict):
+            return _encode(o.opts, js_quotes)
+        return _encode(o.opts or None, js_quotes)
+
+    # numpy arrays and scalars
+    tolist = getattr(o, "tolist", None)
+    if tolist is not None:
+        return _encode(tolist(), js_quotes)
+
+    return _encode(default(o), js_quotes)
+
+
+def encode_options(options: dict, js_quotes: bool = False) -> str:
+    """
+    Compact encoder that drops None and empty strings while encoding,
+    instead of rebuilding the whole options tree first.
+
+    :param js_quotes: write JsCode as strings, as dump_options_with_quotes does
+    """
+    return _encode(options, js_quotes)
+
@@ -26,6 +26,7 @@ class Line(RectChart):
         symbol: types.Optional[str] = None,
         symbol_size: types.Union[types.Numeric, types.Sequence] = 4,
         stack: types.Optional[str] = None,
+        dataset_index: types.Numeric = 0,
         is_smooth: bool = False,
         is_clip: bool = True,
         is_step: bool = False,
@@ -39,11 +40,15 @@ class Line(RectChart):
         label_opts: types.Label = opts.LabelOpts(),
         linestyle_opts: types.LineStyle = opts.LineStyleOpts(),
         areastyle_opts: types.AreaStyle = opts.AreaStyleOpts(),
+        encode: types.Union[types.JSFunc, dict, None] = None,
     ):
         self._append_color(color)
         self._append_legend(series_name, is_selected)
 
-        if all([isinstance(d, opts.LineItem) for d in y_axis]):
+        if self.options.get("dataset") is not None:
+            # data comes from the shared dataset through `encode`
+            data = None
+        elif all([isinstance(d, opts.LineItem) for d in y_axis]):
             data = y_axis
         else:
             # 合并 x 和 y 轴数据，避免当 X 轴的类型设置为 'value' 的时候，
@@ -65,6 +70,8 @@ class Line(RectChart):
                 "step": is_step,
                 "stack": stack,
                 "data": data,
+                "datasetIndex": dataset_index,
+                "encode": encode,
                 "hoverAnimation": is_hover_animation,
                 "label": label_opts,
                 "lineStyle": linestyle_opts,
@@ -3,9 +3,12 @@ import re
 from ..datasets import EXTRA, FILENAMES
 
 
+PLACEHOLDER = "--x_x--0_0--"
+
+
 class JsCode:
     def __init__(self, js_code: str):
-        self.js_code = "--x_x--0_0--" + js_code + "--x_x--0_0--"
+        self.js_code = PLACEHOLDER + js_code + PLACEHOLDER
 
     def replace(self, pattern: str, repl: str):
         self.js_code = re.sub(pattern, repl, self.js_code)
@@ -47,11 +50,15 @@ def produce_require_dict(js_dependencies, js_host) -> dict:
 
 
 def replace_placeholder(html: str) -> str:
+    # JsCode is emitted without placeholders by the encoder, skip the regex pass
+    # unless a placeholder was put into the document some other way
+    if PLACEHOLDER not in html:
+        return html
     return re.sub('"?--x_x--0_0--"?', "", html)
 
 
 def replace_placeholder_with_quotes(html: str) -> str:
-    return re.sub("--x_x--0_0--", "", html)
+    return html.replace(PLACEHOLDER, "")
 
 
 def _flat(obj):
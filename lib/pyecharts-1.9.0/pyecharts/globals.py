@@ -147,6 +147,8 @@ class _CurrentConfig:
     PAGE_TITLE = "Awesome-pyecharts"
     ONLINE_HOST = OnlineHostType.DEFAULT_HOST
     NOTEBOOK_TYPE = NotebookType.JUPYTER_NOTEBOOK
+    # indented dump_options, set to False for the compact single-pass encoder
+    PRETTY_OPTIONS = True
     GLOBAL_ENV = Environment(
         keep_trailing_newline=True,
         trim_blocks=True,
@@ -1,5 +1,7 @@
 import os
+import weakref
 from collections import Iterable
+from functools import lru_cache
 
 from jinja2 import Environment
 
@@ -15,29 +17,46 @@ def write_utf8_html_file(file_name: str, html_content: str):
         html_file.write(html_content)
 
 
+# compiled templates pinned per environment, skipping the loader's up-to-date check
+_TEMPLATES = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=256)
+def _js_links(js_host: str, dependencies: tuple) -> tuple:
+    links = []
+    for dep in dependencies:
+        # TODO: if?
+        if dep.startswith("https://api.map.baidu.com"):
+            links.append(dep)
+        if dep in FILENAMES:
+            f, ext = FILENAMES[dep]
+            links.append("{}{}.{}".format(js_host, f, ext))
+        else:
+            for url, files in EXTRA.items():
+                if dep in files:
+                    f, ext = files[dep]
+                    links.append("{}{}.{}".format(url, f, ext))
+                    break
+    return tuple(links)
+
+
 class RenderEngine:
     def __init__(self, env: Optional[Environment] = None):
         self.env = env or CurrentConfig.GLOBAL_ENV
 
+    def get_template(self, template_name: str):
+        templates = _TEMPLATES.setdefault(self.env, {})
+        tpl = templates.get(template_name)
+        if tpl is None:
+            tpl = templates[template_name] = self.env.get_template(template_name)
+        return tpl
+
     @staticmethod
     def generate_js_link(chart: Any) -> Any:
         if not chart.js_host:
             chart.js_host = CurrentConfig.ONLINE_HOST
-        links = []
-        for dep in chart.js_dependencies.items:
-            # TODO: if?
-            if dep.startswith("https://api.map.baidu.com"):
-                links.append(dep)
-            if dep in FILENAMES:
-                f, ext = FILENAMES[dep]
-                links.append("{}{}.{}".format(chart.js_host, f, ext))
-            else:
-                for url, files in EXTRA.items():
-                    if dep in files:
-                        f, ext = files[dep]
-                        links.append("{}{}.{}".format(url, f, ext))
-                        break
-        chart.dependencies = links
+        links = _js_links(chart.js_host, tuple(chart.js_dependencies.items))
+        chart.dependencies = list(links)
         return chart
 
     def render_chart_to_file(self, template_name: str, chart: Any, path: str, **kwargs):
@@ -48,20 +67,20 @@ class RenderEngine:
         :param path: The destination file which the html code write to
         :param template_name: The name of template file.
         """
-        tpl = self.env.get_template(template_name)
+        tpl = self.get_template(template_name)
         html = utils.replace_placeholder(
             tpl.render(chart=self.generate_js_link(chart), **kwargs)
         )
         write_utf8_html_file(path, html)
 
     def render_chart_to_template(self, template_name: str, chart: Any, **kwargs) -> str:
-        tpl = self.env.get_template(template_name)
+        tpl = self.get_template(template_name)
         return utils.replace_placeholder(
             tpl.render(chart=self.generate_js_link(chart), **kwargs)
         )
 
     def render_chart_to_notebook(self, template_name: str, **kwargs) -> str:
-        tpl = self.env.get_template(template_name)
+        tpl = self.get_template(template_name)
         return utils.replace_placeholder(tpl.render(**kwargs))
 
 
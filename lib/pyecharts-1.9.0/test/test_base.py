@@ -1,9 +1,13 @@
 from unittest.mock import patch
 
-from nose.tools import assert_equal, assert_not_in
+import simplejson as json
+
+from nose.tools import assert_equal, assert_in, assert_not_in
 
 from pyecharts.charts import Bar
 from pyecharts.charts.base import Base
+from pyecharts.commons.utils import JsCode
+from pyecharts.render.engine import RenderEngine
 
 
 def test_base_add_functions():
@@ -30,3 +34,45 @@ def test_render(fake_writer):
     bar = Bar()
     bar.add_xaxis(["1"]).add_yaxis("", [1]).render(my_render_content=my_render_content)
     assert "test ok" == "test ok"
+
+
+def test_dump_options_js_code():
+    c = Base()
+    c.options.update(formatter=JsCode("function (p) { return p.name + '\\n'; }"))
+    assert_in(
+        '"formatter": function (p) { return p.name + \'\\n\'; }', c.dump_options()
+    )
+    assert_in(
+        '"formatter": "function (p) { return p.name + \'\\n\'; }"',
+        c.dump_options_with_quotes(),
+    )
+    assert_not_in("--x_x--0_0--", c.dump_options())
+
+
+def test_render_engine_cache():
+    engine = RenderEngine()
+    assert engine.get_template("simple_chart.html") is engine.get_template(
+        "simple_chart.html"
+    )
+    c = Bar()
+    links = engine.generate_js_link(c).dependencies
+    assert_equal(links, [c.js_host + "echarts.min.js"])
+    assert_equal(RenderEngine.generate_js_link(Bar()).dependencies, links)
+
+
+def test_dump_options_compact():
+    c = Bar().add_xaxis(["A", "B"]).add_yaxis("series0", [1, None])
+    c.options.update(
+        empty="", none=None, nested={"a": None, "b": [{"c": ""}]}, pairs=[(1, 2)]
+    )
+    c.options.update(formatter=JsCode("function (p) { return p.name; }"))
+    content = c.dump_options(pretty=False)
+    assert_not_in("\n", content)
+    assert_not_in('"empty"', content)
+    assert_in('"nested":{"b":[{}]}', content)
+    assert_in('"formatter":function (p) { return p.name; }', content)
+    assert_equal(
+        json.loads(c.dump_options_with_quotes(pretty=False)),
+        json.loads(c.dump_options_with_quotes(pretty=True)),
+    )
+
@@ -90,3 +90,19 @@ def test_line_opts_with_zlevel_z(fake_writer):
     _, content = fake_writer.call_args[0]
     assert_in("zlevel", content)
     assert_in("z", content)
+
+
+def test_line_dataset():
+    c = (
+        Line()
+        .add_dataset(
+            source=[["A", 1, 2], ["B", 2, 3], ["C", 4, 6]],
+            dimensions=["x", "series0", "series1"],
+        )
+        .add_yaxis("series0", [], encode={"x": "x", "y": "series0"})
+        .add_yaxis("series1", [], encode={"x": "x", "y": "series1"})
+    )
+    options = c.get_options()
+    assert_equal(options["dataset"]["dimensions"], ["x", "series0", "series1"])
+    assert_equal(options["series"][1]["encode"], {"x": "x", "y": "series1"})
+    assert "data" not in options["series"][0]
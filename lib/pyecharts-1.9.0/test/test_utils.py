@@ -19,3 +19,10 @@ def test_ordered_set():
     s = utils.OrderedSet()
     s.add("a", "b", "c")
     assert_equal(s.items, ["a", "b", "c"])
+
+
+def test_replace_placeholder():
+    assert_equal(utils.replace_placeholder('{"a": 1}'), '{"a": 1}')
+    assert_equal(
+        utils.replace_placeholder('{"a": "--x_x--0_0--fn--x_x--0_0--"}'), '{"a": fn}'
+    )
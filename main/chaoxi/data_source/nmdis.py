@@ -5,19 +5,28 @@
 # @Author : wuyazibest
 # @Email  : wuyazibest@163.com
 # @Desc   : 国家海洋科学数据中心
+import asyncio
 import datetime
 import json
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import numpy as np
 import pandas as pd
 
 from main.util.common import parse_url
+from main.util.async_http import async_parse_url, run_sync, gevent_patched
 
 logger = logging.getLogger(__name__)
 
+# 默认查询的天数，从今天开始
+WINDOW_DAYS = 30
+# 一次查询的最多站点数，每个站点每天一个上游请求
+MAX_SITES = 10
+
 
 class NmdisStock:
     def __init__(self, headers=None):
@@ -28,21 +37,32 @@ class NmdisStock:
         self.sitecode_map = {
             "T140": "蛇口（赤湾）"
             }
-        self.data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chaoxi_data.xlsx")
+        # 按站点和日期缓存，每天一个文件
+        self.data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chaoxi_data")
     
-    def get_daily_data(self, date, sitecode):
-        ret = {}
-        url = "https://mds.nmdis.org.cn/service/rdata/front/knowledge/chaoxidata/list"
-        payload = {
+    url = "https://mds.nmdis.org.cn/service/rdata/front/knowledge/chaoxidata/list"
+    # 异步请求时同时进行中的请求数
+    concurrency = 10
+    
+    @staticmethod
+    def daily_payload(date, sitecode):
+        return {
             "serchdate": date,  # "2024-12-20",
             "sitecode" : sitecode  # "T140"
             }
-        resp = parse_url(url, method="POST", json=payload, headers=self.headers)
+    
+    def daily_result(self, resp):
         data = resp.get("data")
-        if data:
-            ret = self.format_data(data[0])
-        
-        return ret
+        return self.format_data(data[0]) if data else {}
+    
+    def get_daily_data(self, date, sitecode):
+        resp = parse_url(self.url, method="POST", json=self.daily_payload(date, sitecode), headers=self.headers)
+        return self.daily_result(resp)
+    
+    async def async_get_daily_data(self, date, sitecode, semaphore=None):
+        async with semaphore or asyncio.Semaphore(1):
+            resp = await async_parse_url(self.url, method="POST", json=self.daily_payload(date, sitecode), headers=self.headers)
+        return self.daily_result(resp)
     
     def format_data(self, raw_data):
         data = {}
@@ -56,32 +76,150 @@ class NmdisStock:
         
         return dict(sorted(data.items(), key=lambda x: x[0]))
     
+    def site_name(self, sitecode):
+        return self.sitecode_map.get(sitecode, sitecode)
+    
+    def day_path(self, sitecode, date):
+        return os.path.join(self.data_path, sitecode, f"{date}.json")
+    
+    def load_day(self, sitecode, date):
+        path = self.day_path(sitecode, date)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"读取潮汐缓存失败 {path} error:{e}")
+            return None
+    
+    def save_day(self, sitecode, date, data):
+        path = self.day_path(sitecode, date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换，避免其他进程读到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    
+    def prune(self, sitecode, before):
+        """
+        删除 before 之前的缓存，只保留滚动窗口内的数据
+        """
+        site_path = os.path.join(self.data_path, sitecode)
+        if not os.path.isdir(site_path):
+            return
+        for file_name in os.listdir(site_path):
+            if file_name.endswith(".json") and file_name[:-5] < before:
+                try:
+                    os.remove(os.path.join(site_path, file_name))
+                except OSError:
+                    pass
+    
+    def load_sites(self, sitecodes, days):
+        """
+        :return: {(站点, 日期): 缓存的数据}, 缓存中缺失的 [(站点, 日期)]
+        """
+        data = {(x, y): self.load_day(x, y) for x in sitecodes for y in days}
+        return data, [k for k, v in data.items() if v is None]
+    
+    def save_sites(self, data, missing, fetched):
+        """
+        保存请求到的数据，请求失败或没有数据的不缓存，下次重新请求
+        :return: 请求失败或没有数据的 [(站点, 日期)]
+        """
+        failed = []
+        for (sitecode, date), day_data in zip(missing, fetched):
+            data[(sitecode, date)] = day_data
+            if day_data:
+                self.save_day(sitecode, date, day_data)
+            else:
+                failed.append((sitecode, date))
+        logger.debug(f"潮汐数据 请求:{len(missing)} 缓存:{len(data) - len(missing)} 失败:{len(failed)}")
+        if failed:
+            logger.warning(f"潮汐数据请求失败 {failed}")
+        return failed
+    
+    def merge_sites(self, sitecodes, data):
+        ret = {self.site_name(x): {} for x in sitecodes}
+        for (sitecode, _), day_data in data.items():
+            ret[self.site_name(sitecode)].update(day_data or {})
+        return ret
+    
+    def get_sites_data(self, sitecodes, days):
+        """
+        async_get_sites_data 的同步版本，在线程池中请求，gevent 补丁后使用
+        """
+        data, missing = self.load_sites(sitecodes, days)
+        failed = []
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                fetched = list(executor.map(lambda x: self.get_daily_data(x[1], x[0]), missing))
+            failed = self.save_sites(data, missing, fetched)
+        return self.merge_sites(sitecodes, data), failed
+    
+    async def async_get_sites_data(self, sitecodes, days):
+        """
+        只请求缓存中缺失的(站点, 日期)，所有站点共用并发数限制
+        读写缓存文件在线程池中执行，不阻塞事件循环
+        :return: {站点名称: {时间: 潮高}}, 请求失败或没有数据的 [(站点, 日期)]
+        """
+        loop = asyncio.get_event_loop()
+        data, missing = await loop.run_in_executor(None, self.load_sites, sitecodes, days)
+        failed = []
+        if missing:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            fetched = await asyncio.gather(*[self.async_get_daily_data(y, x, semaphore) for x, y in missing])
+            failed = await loop.run_in_executor(None, self.save_sites, data, missing, fetched)
+        return self.merge_sites(sitecodes, data), failed
+    
     def get_monthly_data(self, sitecode="T140"):
-        ret = {}
-        today = datetime.datetime.now()
-        for i in range(30):
-            next_day = today + datetime.timedelta(i)
-            next_day_str = next_day.strftime("%Y-%m-%d")
-            ret.update(self.get_daily_data(next_day_str, sitecode))
-        
-        return {self.sitecode_map[sitecode]: ret}
+        """
+        从今天开始 WINDOW_DAYS 天的数据，使用按天的缓存
+        :return: {站点名称: {时间: 潮高}}
+        """
+        return self.get_sites_data([sitecode], window_dates())[0]
     
-    def save_data(self):
-        pass
+    async def async_get_monthly_data(self, sitecode="T140"):
+        """
+        get_monthly_data 的异步版本
+        """
+        data, _ = await self.async_get_sites_data([sitecode], window_dates())
+        return data
+
+
+def window_dates(days=WINDOW_DAYS):
+    today = datetime.date.today()
+    return [(today + datetime.timedelta(i)).strftime("%Y-%m-%d") for i in range(days)]
+
+
+def split_sitecode(sitecode):
+    if isinstance(sitecode, str):
+        sitecode = sitecode.split(",")
+    return list(dict.fromkeys(x.strip().upper() for x in sitecode if str(x).strip()))
 
 
-def get_fmt_data():
+def get_fmt_data(sitecode="T140", days=WINDOW_DAYS, ret_stat=False):
+    """
+    从今天开始 days 天的潮汐数据
+    :param sitecode: 站点代码，多个站点逗号分隔或列表
+    :param ret_stat: 是否同时返回请求失败的 [(站点, 日期)]
+    :return: 索引为时间，列为站点名称
+    """
     ns = NmdisStock()
     pd.set_option('display.float_format', lambda x: str(x))
+    sitecodes = split_sitecode(sitecode)
+    dates = window_dates(days)
+    for x in sitecodes:
+        ns.prune(x, dates[0])
     
-    if os.path.exists(ns.data_path):
-        df = pd.read_excel(ns.data_path, index_col=0, header=0, engine="openpyxl")
+    if gevent_patched():
+        df_dict, failed = ns.get_sites_data(sitecodes, dates)
     else:
-        df_dict = ns.get_monthly_data()
-        df = pd.DataFrame.from_dict(df_dict)
-        df.to_excel(ns.data_path, encoding="utf8")
+        df_dict, failed = run_sync(ns.async_get_sites_data(sitecodes, dates))
+    df = pd.DataFrame.from_dict(df_dict).sort_index()
     
-    return df
+    return (df, failed) if ret_stat else df
 
 
 if __name__ == '__main__':
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_nmdis.py
+# @Time   : 2026/10/19 12:00
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import os
+
+from main.chaoxi.data_source.nmdis import NmdisStock, window_dates
+from main.util.async_http import run_sync
+
+DAYS = ["2021-04-01", "2021-04-02", "2021-04-03"]
+
+
+class TestNmdis(object):
+    def test_sites_data(self, tmp_path, monkeypatch):
+        ns = NmdisStock()
+        ns.data_path = str(tmp_path)
+        requests, fail = [], {("T140", "2021-04-02")}
+        
+        async def get_daily_data(date, sitecode, semaphore=None):
+            requests.append((sitecode, date))
+            return {} if (sitecode, date) in fail else {f"{date} 01:00:00": 100}
+        
+        monkeypatch.setattr(ns, "async_get_daily_data", get_daily_data)
+        data, failed = run_sync(ns.async_get_sites_data(["T140", "T141"], DAYS))
+        assert len(requests) == 6 and failed == [("T140", "2021-04-02")]
+        assert len(data["蛇口（赤湾）"]) == 2 and len(data["T141"]) == 3
+        
+        # 按(站点, 日期)缓存，只重新请求失败的
+        fail.clear()
+        data, failed = run_sync(ns.async_get_sites_data(["T140", "T141"], DAYS))
+        assert requests[6:] == [("T140", "2021-04-02")] and not failed
+        assert len(data["蛇口（赤湾）"]) == 3
+        
+        ns.prune("T140", "2021-04-03")
+        assert os.listdir(tmp_path / "T140") == ["2021-04-03.json"]
+        assert len(os.listdir(tmp_path / "T141")) == 3
+    
+    def test_sites_data_sync(self, tmp_path, monkeypatch):
+        # gevent 补丁后使用线程池请求，缓存与异步版本相同
+        ns = NmdisStock()
+        ns.data_path = str(tmp_path)
+        monkeypatch.setattr(ns, "get_daily_data", lambda date, sitecode: {} if date == DAYS[0] else {date: 1})
+        data, failed = ns.get_sites_data(["T140"], DAYS)
+        assert failed == [("T140", DAYS[0])] and list(data["蛇口（赤湾）"]) == DAYS[1:]
+        assert sorted(os.listdir(tmp_path / "T140")) == [f"{x}.json" for x in DAYS[1:]]
+    
+    def test_monthly_data(self, tmp_path, monkeypatch):
+        ns = NmdisStock()
+        ns.data_path = str(tmp_path)
+        monkeypatch.setattr(ns, "get_daily_data", lambda date, sitecode: {f"{date} 01:00:00": 100})
+        data = ns.get_monthly_data("T140")
+        assert list(data) == ["蛇口（赤湾）"] and len(data["蛇口（赤湾）"]) == len(window_dates())
+        
+        # 已缓存的天不再请求
+        async def get_daily_data(date, sitecode, semaphore=None):
+            raise AssertionError(date)
+        
+        monkeypatch.setattr(ns, "async_get_daily_data", get_daily_data)
+        assert run_sync(ns.async_get_monthly_data("T140")) == data
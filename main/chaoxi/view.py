@@ -5,8 +5,10 @@
 # @Author : wuyazibest
 # @Email  : wuyazibest@163.com
 # @Desc   :
+import datetime
 import logging
 import os
+import re
 import uuid
 
 from flask import request, send_file, send_from_directory, render_template
@@ -29,7 +31,9 @@ from main.core import (
     json_resp,
     )
 from main.draw_chart.data_source import tiobe, tencent_stock, ifeng_stock
-from main.util.draw import draw_bar, draw_line, draw_timeline
+from main.util.artifact_cache import artifact_cache
+from main.util.draw import draw_bar, draw_line, draw_timeline, draw_frame
+from main.util.draw.render import chart_response, FORMATS
 
 logger = logging.getLogger(__name__)
 
@@ -42,19 +46,37 @@ class ChaoXiView(ModelViewSet):
         self.resources += "查询"
         logger.info(f"{self.resources} user:{self.current_user.username} params:{self.request_args}")
         
-        file_name = "line_chaoxi_chart.html"
-        file_path = os.path.join(BASE_DIR, "dist", file_name)
-        if os.path.exists(file_path):
-            return render_template(file_name)
+        sitecode = nmdis.split_sitecode(self.request_args.get("sitecode") or "T140")
+        if not sitecode or not all(re.match(r"^[A-Z]\d+$", x) for x in sitecode):
+            raise ParamError("站点代码错误")
+        if len(sitecode) > nmdis.MAX_SITES:
+            raise ParamError(f"站点最多{nmdis.MAX_SITES}个")
+        max_points = str(self.request_args.get("max_points") or 0)
+        if not max_points.isdecimal():
+            raise ParamError("参数错误")
+        max_points = int(max_points)
+        fmt = self.request_args.get("format") or "html"
+        if fmt not in FORMATS:
+            raise ParamError("参数错误")
+        max_points = max_points or FORMATS[fmt].get("max_points", 0)
+        
+        # 每天一个图表，数据为从当天开始的滚动窗口
+        key = artifact_cache.key("chaoxi", {"sitecode": sitecode, "date": f"{datetime.date.today():%Y%m%d}",
+                                            "max_points": max_points, "format": fmt})
         
         title = {
-            "path"      : file_path,
+            "path"      : None,
             "title"     : "潮汐表",
             "xaxis_name": "时间",
             "yaxis_name": "潮高",
             }
         
-        df = nmdis.get_fmt_data()
-        draw_line(df.index.values.tolist(), df.to_dict("list"), **title)
+        failed = []
+        
+        def build():
+            df, ret = nmdis.get_fmt_data(sitecode, ret_stat=True)
+            failed.extend(ret)
+            return draw_frame(df, "line", max_points=max_points, dataset=True, **title)
         
-        return render_template(file_name)
+        # 有请求失败的日期时不缓存图表，下次请求重新生成，否则当天都缺少这部分数据
+        return chart_response(key, build, fmt=fmt, persist=lambda: not failed)
@@ -152,6 +152,20 @@ CACHE_THRESHOLD = 1000
 CACHE_TYPE = "redis"
 CACHE_REDIS_URL = f"redis://:{RedisConf.password}@{RedisConf.host}:{RedisConf.port}/{RedisConf.db2}"
 
+# 图表文件缓存总大小上限 字节，包含压缩文件
+ARTIFACT_CACHE_BYTES = 512 * 1024 * 1024
+# 图表文件缓存淘汰策略 lru lfu
+ARTIFACT_CACHE_POLICY = "lru"
+
+# 批量请求股票时在事件循环中并发，复用常驻事件循环的连接，否则使用线程池
+# gevent 补丁后(gunicorn gevent worker)常驻事件循环不可用，始终使用线程池
+STOCK_USE_ASYNC = True
+
+# 生成多个图表的进程池进程数，不超过cpu数量，0 不使用进程池
+# celery prefork worker、gevent 补丁后的进程中始终在当前进程生成
+# uwsgi 中需要配置 py-sys-executable 为 python 解释器，否则在当前进程生成
+RENDER_POOL_WORKERS = 0
+
 # jwt生存时间
 JWT_EXPIRATION_DELTA = 60 * 60 * 12
 
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : dashboard.py
+# @Time   : 2026/10/18 23:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 在进程池中生成的图表，函数和参数需要可以 pickle，不依赖 flask，数据在主进程中获取后传入
+import datetime
+
+from main.draw_chart.data_source import tiobe, tencent_stock, ifeng_stock, auto_stock, sina_stock
+from main.util.artifact_cache import artifact_cache
+from main.util.draw import draw_frame
+
+DATA_SOURCES = {
+    "tencent": tencent_stock,
+    "ifeng"  : ifeng_stock,
+    "auto"   : auto_stock,
+    "sina"   : sina_stock,
+    }
+TIOBE_CHART_TYPES = ["bar", "line", "timeline"]
+TIOBE_TITLE = {
+    "title"     : "开发语言热度",
+    "xaxis_name": "语言种类",
+    "yaxis_name": "热度",
+    }
+
+
+def unsupported_targets(data_source, targets):
+    """
+    数据源不支持的指标不请求，如新浪快照不能计算依赖历史数据的指标
+    :return: targets 中数据源不支持的指标
+    """
+    supported = getattr(DATA_SOURCES[data_source], "TARGETS", None)
+    return [x for x in targets if supported is not None and x not in supported]
+
+
+def tiobe_key(chart_type, fmt="html"):
+    # 数据更新后版本号变化，不再使用旧的图表
+    return artifact_cache.key("tiobe", {"chart_type": chart_type, "version": tiobe.get_version(), "format": fmt})
+
+
+def tiobe_chart(chart_type, df=None):
+    """
+    :param df: 热度矩阵，为空时读取
+    """
+    df = tiobe.get_matrix() if df is None else df
+    return draw_frame(df, chart_type, dataset=True, path=None, **TIOBE_TITLE)
+
+
+def stock_version():
+    """
+    股票图表按天区分，结束日期未过去时当天数据还会更新
+    过去的区间前复权价格每天校验一次锚点(check_anchor)，除权后重新同步
+    """
+    return f"{datetime.date.today():%Y%m%d}"
+
+
+def stock_frame(data_source, params):
+    """
+    :param params: batch_request_stock 的参数
+    :return: DataFrame, 超时、出错或没有数据的股票代码
+    """
+    df, stat = DATA_SOURCES[data_source].batch_request_stock(**params, ret_stat=True)
+    return df, [x for x, v in stat.items() if v["status"] != "ok"]
+
+
+def frame_chart(df, chart_type="line", max_points=0, title="股票趋势"):
+    return draw_frame(df, chart_type, max_points=max_points, dataset=True, path=None,
+                      title=title, xaxis_name="股票", yaxis_name="数值")
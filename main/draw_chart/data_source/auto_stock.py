@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : auto_stock.py
+# @Time   : 2026/10/18 18:10
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 自动选择数据源，优先数据源慢时同时请求备用数据源，取先返回的结果
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+from main.draw_chart.data_source import tencent_stock, ifeng_stock
+from main.draw_chart.data_source.data_stock import batch_request
+from main.draw_chart.data_source.indicator import INDICATORS
+
+logger = logging.getLogger(__name__)
+
+# 按优先级排列
+PROVIDERS = {
+    "tencent": tencent_stock,
+    "ifeng"  : ifeng_stock,
+    }
+# 优先数据源超过该时间未返回时请求备用数据源 秒
+HEDGE_DELAY = 1.5
+# 统一的列顺序，不同数据源原始列顺序不同
+COLUMNS = ["open", "close", "high", "low", "volume", "week", *INDICATORS]
+
+# 落后的请求在后台结束，不阻塞调用方
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+
+def normalize(df, target=None, date_num=None):
+    """
+    统一截取最后 date_num 条，与 tencent_stock.request_stock 相同，统一列顺序
+    """
+    if df.empty:
+        return df
+    df = df.iloc[-date_num:] if date_num else df
+    if target:
+        return df
+    return df.reindex(columns=[x for x in COLUMNS if x in df.columns])
+
+
+def provider_kwargs(name, begin_date, end_date, date_num, kwargs):
+    """
+    腾讯取最后 date_num 条，凤凰取最前 date_num + 1 条，都请求完整区间后由 normalize 截取
+    腾讯不使用本地存储时 date_num 为接口参数，接口本身从结束时间倒退返回
+    """
+    full = name != "tencent" or (kwargs.get("use_store", True) and begin_date and end_date)
+    return {**kwargs, "date_num": None if full else date_num}
+
+
+def check_prefer(prefer):
+    if prefer not in PROVIDERS:
+        raise ValueError(f"不支持的数据源 {prefer}")
+
+
+def request_stock(stock_code, begin_date, end_date, target=None, prefer="tencent", hedge_delay=HEDGE_DELAY, **kwargs):
+    """
+    先请求优先数据源，hedge_delay 秒内未返回、出错或无数据时请求下一个数据源，返回第一个有数据的结果
+    :param prefer: 优先数据源
+    :param hedge_delay: 请求下一个数据源前的等待时间 秒
+    :return: 与 tencent_stock.request_stock 相同
+    """
+    check_prefer(prefer)
+    date_num = kwargs.pop("date_num", 100)
+    names = [prefer, *[x for x in PROVIDERS if x != prefer]]
+    futures, pending, error = {}, set(), None
+    tt = time.time()
+    
+    def submit():
+        name = names[len(futures)]
+        future = _executor.submit(PROVIDERS[name].request_stock, stock_code, begin_date, end_date, target,
+                                  **provider_kwargs(name, begin_date, end_date, date_num, kwargs))
+        futures[future] = name
+        pending.add(future)
+    
+    submit()
+    while pending:
+        # 还有备用数据源时最多等待 hedge_delay
+        timeout = hedge_delay if len(futures) < len(names) else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            try:
+                df = future.result()
+            except Exception as e:
+                logger.warning(f"数据源请求失败 {futures[future]} {stock_code} error:{e}")
+                error = e
+                continue
+            if not df.empty:
+                logger.debug(f"数据源 {futures[future]} {stock_code} time:{(time.time() - tt):.3f}")
+                return normalize(df, target, date_num)
+        
+        # 超时或已返回的都失败了
+        if len(futures) < len(names):
+            submit()
+    
+    if error:
+        raise error
+    return pd.DataFrame([])
+
+
+def batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False, **kwargs):
+    """
+    :param ret_stat: 是否同时返回每只股票的耗时和状态
+    """
+    # 在并发请求前校验，否则每只股票都记为请求出错
+    check_prefer(kwargs.get("prefer", "tencent"))
+    df, stat = batch_request(request_stock, stock_code, begin_date, end_date, target, **kwargs)
+    
+    return (df, stat) if ret_stat else df
+
+
+if __name__ == '__main__':
+    ret = batch_request_stock(stock_code=["601318", "601238", "688981"], begin_date="2021-04-01", end_date="2021-04-15",
+                              target="price_range")
+    print(ret)
@@ -5,13 +5,234 @@
 # @Author : wuyazibest
 # @Email  : wuyazibest@163.com
 # @Desc   :
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
-def talib_format(fn, *args, **kwargs):
-    import talib
-    return getattr(talib, fn)(*args, **kwargs)
+import pandas as pd
+
+from main.draw_chart.data_source.indicator import INDICATORS, compute_indicators
+
+logger = logging.getLogger(__name__)
+
+# 由日线聚合的周期 pandas Period 频率
+RESAMPLE_FREQ = {
+    "week"   : "W",
+    "month"  : "M",
+    "quarter": "Q",
+    }
+# 批量查询时的最大并发数
+BATCH_MAX_WORKERS = 8
+# 批量查询时等待全部股票返回的最长时间，超时的股票不再等待
+BATCH_WAIT_TIMEOUT = 30
 
 
 def format_stock_code(stock_code):
     stock_code = str(stock_code)
     return stock_code if not stock_code[:1].isdecimal() else \
         "sh%s" % stock_code if stock_code[:1] in ["5", "6", "9"] or stock_code[:2] in ["11", "13"] else "sz%s" % stock_code
+
+
+def format_target(df, columns, stock_code, target=None):
+    """
+    计算衍生指标，指定指标时只返回该指标，列名为股票代码
+    :param df: 数据源 format_data 格式的 DataFrame
+    :param columns: 数据源的原始列名
+    :param stock_code:
+    :param target:
+    :return:
+    """
+    columns_name = [
+        *columns,
+        "week",
+        *INDICATORS,
+        ]
+    if target and target in columns_name:
+        # 只计算需要的指标
+        df = df[[target]] if target not in INDICATORS else compute_indicators(df, [target])
+        df = df.rename(columns={target: stock_code})
+    else:
+        df = pd.concat([df, compute_indicators(df)], axis=1)
+    
+    # 保留小数位
+    df = df.round(2)
+    # 填充nan
+    # df = df.fillna(0)
+    # df = df.replace({np.nan: None})
+    
+    return df
+
+
+def resample_data(df, cycle="day"):
+    """
+    日线聚合为周线、月线、季线，也可以由月线聚合为季线
+    开盘价取第一个，最高价取最大，最低价取最小，收盘价取最后一个，成交量求和
+    :param df: 数据源 format_data 格式的 DataFrame
+    :param cycle: day week month quarter
+    :return: 索引为每个周期最后一个交易日
+    """
+    if cycle not in RESAMPLE_FREQ or df.empty:
+        return df
+    
+    dates = pd.DatetimeIndex(df.index)
+    key = dates.to_period(RESAMPLE_FREQ[cycle])
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    grouped = df.groupby(key, sort=True)
+    ret = grouped.agg({k: v for k, v in agg.items() if k in df.columns})
+    last_date = pd.Series(df.index, index=key).groupby(level=0, sort=True).last()
+    ret.index = pd.Index(last_date.to_numpy(), name=df.index.name)
+    if "week" in df.columns:
+        ret["week"] = pd.DatetimeIndex(ret.index).weekday + 1
+    
+    return ret[[x for x in df.columns if x in ret.columns]]
+
+
+def compact_frame(df):
+    """
+    压缩内存占用：价格等浮点列 float32，成交量为整数时转为最小的整数类型，星期 int8，索引转为 datetime64
+    批量合并后缺失值会使整数列变回浮点
+    """
+    if df.empty:
+        return df
+    
+    df = df.copy()
+    for column in df.columns:
+        if column == "week":
+            df[column] = df[column].astype("int8")
+        elif column == "volume" and df[column].notna().all() and (df[column] % 1 == 0).all():
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[column]):
+            df[column] = df[column].astype("float32")
+    df.index = pd.DatetimeIndex(df.index, name=df.index.name)
+    
+    return df
+
+
+def split_stock_code(stock_code):
+    """
+    单个股票代码时请求参数为字符串，兼容逗号分隔
+    """
+    if isinstance(stock_code, str):
+        stock_code = stock_code.split(",")
+    return [x.strip() for x in stock_code if str(x).strip()]
+
+
+def _timed_request(request_fn, stock_code, *args, **kwargs):
+    tt = time.time()
+    try:
+        df = request_fn(stock_code, *args, **kwargs)
+        status, error = ("ok" if not df.empty else "empty"), ""
+    except Exception as e:
+        df, status, error = pd.DataFrame([]), "error", str(e)
+    return df, {"elapsed": round(time.time() - tt, 3), "status": status, "error": error}
+
+
+async def _async_timed_request(request_fn, semaphore, stock_code, *args, **kwargs):
+    async with semaphore:
+        tt = time.time()
+        try:
+            df = await request_fn(stock_code, *args, **kwargs)
+            status, error = ("ok" if not df.empty else "empty"), ""
+        except Exception as e:
+            df, status, error = pd.DataFrame([]), "error", str(e)
+        return df, {"elapsed": round(time.time() - tt, 3), "status": status, "error": error}
+
+
+def _merge_batch(stock_code, frames, stat, tt):
+    for code, v in stat.items():
+        if v["status"] != "ok":
+            logger.warning(f"批量查询股票 {code} {v['status']} time:{v['elapsed']:.3f} error:{v['error']}")
+    logger.debug(f"批量查询股票 time:{(time.time() - tt):.3f} stat:{stat}")
+    
+    # 按请求顺序合并
+    frames = [frames[x] for x in stock_code if x in frames and not frames[x].empty]
+    return pd.concat(frames, join="outer", axis=1, sort=True) if frames else pd.DataFrame([])
+
+
+def batch_request(request_fn,
+                  stock_code,
+                  begin_date,
+                  end_date,
+                  target,
+                  max_workers=BATCH_MAX_WORKERS,
+                  wait_timeout=BATCH_WAIT_TIMEOUT,
+                  **kwargs):
+    """
+    并发请求多只股票，全部返回后只做一次外连接
+    :param request_fn: 单只股票的请求函数 request_stock
+    :param stock_code: 股票代码列表
+    :param begin_date:
+    :param end_date:
+    :param target:
+    :param max_workers: 最大并发数
+    :param wait_timeout: 最长等待时间，超时未返回的股票不参与合并
+    :param kwargs:
+    :return: df, stat
+    stat:
+    {
+        "sh601318": {"elapsed": 0.231, "status": "ok", "error": ""},
+        "sh601238": {"elapsed": 30.0, "status": "timeout", "error": ""},
+    }
+    status: ok 成功 empty 无数据 error 请求出错 timeout 超时
+    """
+    stock_code = split_stock_code(stock_code)
+    if not stock_code:
+        return pd.DataFrame([]), {}
+    
+    tt = time.time()
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(stock_code)))
+    futures = {
+        executor.submit(_timed_request, request_fn, code, begin_date, end_date, target, **kwargs): code
+        for code in stock_code
+        }
+    done, not_done = wait(futures, timeout=wait_timeout)
+    # 还在排队的请求不再执行，python3.7 的 shutdown 不能取消，正在执行的线程在后台结束
+    for future in not_done:
+        future.cancel()
+    executor.shutdown(wait=False)
+    
+    frames, stat = {}, {}
+    for future, code in futures.items():
+        if future in done:
+            frames[code], stat[code] = future.result()
+        else:
+            stat[code] = {"elapsed": round(time.time() - tt, 3), "status": "timeout", "error": ""}
+    
+    return _merge_batch(stock_code, frames, stat, tt), stat
+
+
+async def async_batch_request(request_fn,
+                              stock_code,
+                              begin_date,
+                              end_date,
+                              target,
+                              max_workers=BATCH_MAX_WORKERS,
+                              wait_timeout=BATCH_WAIT_TIMEOUT,
+                              **kwargs):
+    """
+    batch_request 的异步版本，参数及返回值相同
+    :param request_fn: 单只股票的异步请求函数 async_request_stock
+    :param max_workers: 同时进行中的请求数
+    """
+    stock_code = split_stock_code(stock_code)
+    if not stock_code:
+        return pd.DataFrame([]), {}
+    
+    tt = time.time()
+    semaphore = asyncio.Semaphore(max_workers)
+    tasks = {
+        asyncio.ensure_future(_async_timed_request(request_fn, semaphore, code, begin_date, end_date, target, **kwargs)): code
+        for code in stock_code
+        }
+    await asyncio.wait(tasks, timeout=wait_timeout)
+    
+    frames, stat = {}, {}
+    for task, code in tasks.items():
+        if task.done():
+            frames[code], stat[code] = task.result()
+        else:
+            task.cancel()
+            stat[code] = {"elapsed": round(time.time() - tt, 3), "status": "timeout", "error": ""}
+    
+    return _merge_batch(stock_code, frames, stat, tt), stat
@@ -6,21 +6,34 @@
 # @Email  : wuyazibest@163.com
 # @Desc   : 凤凰网
 
+import collections
 import json
 import logging
+import threading
 import time
 import numpy as np
 import pandas as pd
 import requests
 
+from main.config import STOCK_USE_ASYNC
 from main.util.common import parse_url
-from main.draw_chart.data_source.data_stock import talib_format, format_stock_code
+from main.util.async_http import async_parse_url, run_sync, gevent_patched
+from main.draw_chart.data_source.data_stock import format_stock_code, format_target, compact_frame, resample_data, batch_request, async_batch_request
+from main.draw_chart.data_source.stock_store import StockStore, fetch_with_store, async_fetch_with_store
 
 logger = logging.getLogger(__name__)
 
+# 解析后的全部历史数据缓存时间 秒
+HISTORY_TTL = 300
+# 缓存的股票数量
+HISTORY_CACHE_SIZE = 64
+
 
 class IFengStock:
     columns = ["date", "open", "high", "close", "low", "volume"]
+    # 按股票代码缓存解析后的全部历史数据 {stock_code: (time, df)}
+    _history = collections.OrderedDict()
+    _history_lock = threading.Lock()
     
     def __init__(self, headers=None, columns=None):
         self.headers = headers or {
@@ -55,84 +68,211 @@ class IFengStock:
         ]
         """
         
+        url, params = self.daily_params(stock_code)
+        resp = parse_url(url, params=params, headers=self.headers, **kwargs)
+        
+        # resp.get("record") 股票代码错误时返回的为字典
+        return resp.get("record") or []
+    
+    async def async_get_daily_data(self, stock_code, cycle="day", begin_date="", end_date="", date_num=100, fq_type="qfd", **kwargs):
+        """
+        get_daily_data 的异步版本
+        """
+        url, params = self.daily_params(stock_code)
+        resp = await async_parse_url(url, params=params, headers=self.headers, **kwargs)
+        
+        return resp.get("record") or []
+    
+    @staticmethod
+    def daily_params(stock_code):
         url = "http://api.finance.ifeng.com/"
         stock_code = format_stock_code(stock_code)
-        cycle = cycle
-        begin_date = begin_date  # 从结束时间倒退，如果没有超过开始时间，则返回限制的天数，如果超过，则返回日期限制
-        end_date = end_date
-        date_num = date_num
-        fq_type = fq_type
         url += "akdaily/"
         params = {
             "code": stock_code,
             "type": "last"
             }
-        resp = parse_url(url, params=params, headers=self.headers, **kwargs)
-        
-        # resp.get("record") 股票代码错误时返回的为字典
-        return resp.get("record") or []
+        return url, params
     
-    def format_data(self,
-                    data,
-                    begin_date="",
-                    end_date="",
-                    date_num=100,
-                    ):
+    def parse_data(self, data):
+        """
+        解析全部历史数据，索引为排序后的 DatetimeIndex
+        """
         df = pd.DataFrame(data)
         # 分红时返回的列数为7
         df = df.iloc[:, :6].set_axis(self.columns, axis='columns')
-        df = df.set_index("date")
-        df = df[(df.index >= begin_date) & (df.index <= end_date)]
-        df = df.iloc[:date_num + 1, :]
+        df.index = pd.DatetimeIndex(df.pop("date"), name="date")
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index(kind="mergesort")
         
         df = df.astype(float)
         # 星期数
-        df["week"] = pd.to_datetime(df.index).weekday + 1
+        df["week"] = df.index.weekday + 1
         
         return df
+    
+    @staticmethod
+    def slice_data(df, begin_date="", end_date="", date_num=100):
+        """
+        二分查找截取日期区间，索引转回 %Y-%m-%d 格式的字符串
+        """
+        left = df.index.searchsorted(pd.Timestamp(begin_date), side="left") if begin_date else 0
+        right = df.index.searchsorted(pd.Timestamp(end_date), side="right") if end_date else len(df)
+        if date_num is not None:
+            right = min(right, left + date_num + 1)
+        
+        df = df.iloc[left:right].copy()
+        df.index = pd.Index(df.index.strftime("%Y-%m-%d"), name="date")
+        return df
+    
+    def format_data(self,
+                    data,
+                    begin_date="",
+                    end_date="",
+                    date_num=100,
+                    ):
+        return self.slice_data(self.parse_data(data), begin_date, end_date, date_num)
+    
+    def _get_cached(self, stock_code):
+        with self._history_lock:
+            item = self._history.get(stock_code)
+            if item and time.time() - item[0] < HISTORY_TTL:
+                self._history.move_to_end(stock_code)
+                return item[1]
+    
+    def _set_cached(self, stock_code, df):
+        with self._history_lock:
+            self._history[stock_code] = (time.time(), df)
+            self._history.move_to_end(stock_code)
+            while len(self._history) > HISTORY_CACHE_SIZE:
+                self._history.popitem(last=False)
+    
+    def get_history(self, stock_code, **kwargs):
+        """
+        解析后的全部历史数据，同一股票不同日期区间的请求共用
+        """
+        stock_code = format_stock_code(stock_code)
+        df = self._get_cached(stock_code)
+        if df is None:
+            data = self.get_daily_data(stock_code=stock_code, **kwargs)
+            if not data:
+                return pd.DataFrame([])
+            df = self.parse_data(data)
+            self._set_cached(stock_code, df)
+        return df
+    
+    async def async_get_history(self, stock_code, **kwargs):
+        """
+        get_history 的异步版本
+        """
+        stock_code = format_stock_code(stock_code)
+        df = self._get_cached(stock_code)
+        if df is None:
+            data = await self.async_get_daily_data(stock_code=stock_code, **kwargs)
+            if not data:
+                return pd.DataFrame([])
+            df = self.parse_data(data)
+            self._set_cached(stock_code, df)
+        return df
 
 
-def request_stock(stock_code, begin_date, end_date, target=None, **kwargs):
+def load_daily_data(stock_code, begin_date, end_date, date_num=100, **kwargs):
+    """
+    日线数据优先从本地存储读取，只向上游请求缺失的日期区间
+    """
+    stock = IFengStock()
+    stock_code = format_stock_code(stock_code)
+    
+    def fetch(begin, end):
+        # 接口每次都返回全部历史数据，按缺失区间截取后存储
+        df = stock.get_history(stock_code, raise_exception=True, **kwargs)
+        return stock.slice_data(df, begin_date=begin, end_date=end, date_num=None) if not df.empty else df
+    
+    df = fetch_with_store(StockStore("ifeng"), stock_code, begin_date, end_date, fetch)
+    return df.iloc[:date_num + 1] if date_num is not None else df
+
+
+async def async_load_daily_data(stock_code, begin_date, end_date, date_num=100, **kwargs):
+    """
+    load_daily_data 的异步版本
+    """
+    stock = IFengStock()
+    stock_code = format_stock_code(stock_code)
+    
+    async def fetch(begin, end):
+        df = await stock.async_get_history(stock_code, raise_exception=True, **kwargs)
+        return stock.slice_data(df, begin_date=begin, end_date=end, date_num=None) if not df.empty else df
+    
+    df = await async_fetch_with_store(StockStore("ifeng"), stock_code, begin_date, end_date, fetch)
+    return df.iloc[:date_num + 1] if date_num is not None else df
+
+
+def request_stock(stock_code, begin_date, end_date, target=None, use_store=True, compact=False, **kwargs):
+    """
+    :param use_store: 是否使用本地存储
+    :param compact: 是否压缩内存占用，见 compact_frame
+    """
     pd.set_option('display.float_format', lambda x: str(x))
     stock = IFengStock()
-    data = stock.get_daily_data(stock_code=stock_code, **kwargs)
-    if not data:
+    # 接口只有日线，其他周期由日线聚合
+    cycle = kwargs.pop("cycle", "day")
+    date_num = kwargs.pop("date_num", 100)
+    if use_store and begin_date and end_date:
+        df = load_daily_data(stock_code, begin_date, end_date, date_num=None, **kwargs)
+    else:
+        df = stock.get_history(stock_code, **kwargs)
+        df = stock.slice_data(df, begin_date=begin_date, end_date=end_date, date_num=None) if not df.empty else df
+    df = resample_data(df, cycle)
+    df = df.iloc[:date_num + 1] if date_num is not None else df
+    
+    if df.empty:
         return pd.DataFrame([])
     
-    df = stock.format_data(data, begin_date=begin_date, end_date=end_date, date_num=kwargs.get("date_num", 100))
+    df = format_target(df, stock.columns, stock_code, target)
+    return compact_frame(df) if compact else df
+
+
+async def async_request_stock(stock_code, begin_date, end_date, target=None, use_store=True, compact=False, **kwargs):
+    """
+    request_stock 的异步版本
+    """
+    stock = IFengStock()
+    # 接口只有日线，其他周期由日线聚合
+    cycle = kwargs.pop("cycle", "day")
+    date_num = kwargs.pop("date_num", 100)
+    if use_store and begin_date and end_date:
+        df = await async_load_daily_data(stock_code, begin_date, end_date, date_num=None, **kwargs)
+    else:
+        df = await stock.async_get_history(stock_code, **kwargs)
+        df = stock.slice_data(df, begin_date=begin_date, end_date=end_date, date_num=None) if not df.empty else df
+    df = resample_data(df, cycle)
+    df = df.iloc[:date_num + 1] if date_num is not None else df
     
-    columns_name = [
-        *stock.columns,
-        "week",
-        "ys_close",
-        "true_range",
-        "price_range",
-        ]
-    # 昨日收盘价
-    df["ys_close"] = df["close"].shift(1)
-    # 真实波幅
-    df["true_range"] = talib_format("TRANGE", df["high"], df["low"], df["close"]) / df[["close", "low"]].min(axis=1) * 100
-    # 涨跌幅
-    df["price_range"] = (df["close"] - df["ys_close"]) / df["ys_close"] * 100
-    # 保留小数位
-    df = df.round(2)
-    # 填充nan
-    # df = df.fillna(0)
-    # df = df.replace({np.nan: None})
-    
-    if target and target in columns_name:
-        df = df[[target]]
-        df = df.rename(columns={target: stock_code})
-    
-    return df
-
-
-def batch_request_stock(stock_code, begin_date, end_date, target, **kwargs):
-    df = pd.DataFrame([])
-    for i in stock_code:
-        df = pd.concat([df, request_stock(i, begin_date, end_date, target, **kwargs)], join='outer', axis=1)
-    
-    return df
+    if df.empty:
+        return pd.DataFrame([])
+    
+    df = format_target(df, stock.columns, stock_code, target)
+    return compact_frame(df) if compact else df
+
+
+def batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False, use_async=STOCK_USE_ASYNC, **kwargs):
+    """
+    :param ret_stat: 是否同时返回每只股票的耗时和状态
+    :param use_async: 是否在事件循环中并发请求，否则使用线程池，gevent 补丁后始终使用线程池
+    kwargs 传给 request_stock，如 compact=True 压缩内存占用
+    """
+    if use_async and not gevent_patched():
+        df, stat = run_sync(async_batch_request(async_request_stock, stock_code, begin_date, end_date, target, **kwargs))
+    else:
+        df, stat = batch_request(request_stock, stock_code, begin_date, end_date, target, **kwargs)
+    
+    return (df, stat) if ret_stat else df
+
+
+async def async_batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False, **kwargs):
+    df, stat = await async_batch_request(async_request_stock, stock_code, begin_date, end_date, target, **kwargs)
+    
+    return (df, stat) if ret_stat else df
 
 
 if __name__ == '__main__':
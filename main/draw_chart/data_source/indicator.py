@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : indicator.py
+# @Time   : 2026/10/18 17:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 技术指标，基于 numpy/pandas 向量化计算，不依赖 TA-Lib
+import numpy as np
+import pandas as pd
+
+
+class IndicatorCalc:
+    """
+    一次计算多个指标，均线、真实波幅等中间结果只计算一次
+    :param df: 数据源 format_data 格式的 DataFrame，需要 open close high low volume 列
+    """
+    
+    def __init__(self, df):
+        self.index = df.index
+        self.close = df["close"].astype("float64")
+        self.high = df["high"].astype("float64")
+        self.low = df["low"].astype("float64")
+        self._cache = {}
+    
+    def _memo(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+    
+    def ys_close(self):
+        """昨日收盘价"""
+        return self._memo("ys_close", lambda: self.close.shift(1))
+    
+    def trange(self):
+        """真实波幅 max(high, ys_close) - min(low, ys_close)，与 TA-Lib TRANGE 一致，第一天为nan"""
+        
+        def fn():
+            ys_close = self.ys_close().to_numpy()
+            tr = np.fmax(self.high.to_numpy(), ys_close) - np.fmin(self.low.to_numpy(), ys_close)
+            tr[np.isnan(ys_close)] = np.nan
+            return pd.Series(tr, index=self.index)
+        
+        return self._memo("trange", fn)
+    
+    def ma(self, n, series="close"):
+        return self._memo(("ma", n, series), lambda: getattr(self, series).rolling(n).mean())
+    
+    def std(self, n):
+        # 与 TA-Lib BBANDS 一致使用总体标准差
+        return self._memo(("std", n), lambda: self.close.rolling(n).std(ddof=0))
+    
+    def ema(self, n, series="close"):
+        return self._memo(("ema", n, series), lambda: getattr(self, series).ewm(span=n, adjust=False).mean())
+    
+    def wilder(self, key, series, n):
+        """Wilder 平滑 alpha=1/n，RSI、ATR 使用"""
+        return self._memo(("wilder", key, n), lambda: series.ewm(alpha=1 / n, adjust=False).mean())
+    
+    def macd(self):
+        return self._memo("macd", lambda: self.ema(12) - self.ema(26))
+    
+    def macd_signal(self):
+        return self._memo("macd_signal", lambda: self.macd().ewm(span=9, adjust=False).mean())
+    
+    def rsi(self, n=14):
+        def fn():
+            diff = self.close.diff()
+            gain = self.wilder("gain", diff.clip(lower=0), n)
+            loss = self.wilder("loss", (-diff).clip(lower=0), n)
+            rsi = 100 - 100 / (1 + gain / loss)
+            # 没有下跌时 gain/loss 为 inf，rsi 为 100
+            return rsi.where(loss != 0, 100).where(diff.notna())
+        
+        return self._memo(("rsi", n), fn)
+    
+    def log_return(self):
+        return self._memo("log_return", lambda: np.log(self.close / self.ys_close()))
+
+
+"""
+指标名: 计算函数
+price_range 涨跌幅 %
+true_range  真实波幅 占最低价的百分比 %
+volatility  20日收益率标准差年化 %
+"""
+INDICATORS = {
+    "ys_close"   : lambda c: c.ys_close(),
+    "true_range" : lambda c: c.trange() / pd.concat([c.close, c.low], axis=1).min(axis=1) * 100,
+    "price_range": lambda c: (c.close - c.ys_close()) / c.ys_close() * 100,
+    "ma5"        : lambda c: c.ma(5),
+    "ma10"       : lambda c: c.ma(10),
+    "ma20"       : lambda c: c.ma(20),
+    "ema12"      : lambda c: c.ema(12),
+    "ema26"      : lambda c: c.ema(26),
+    "macd"       : lambda c: c.macd(),
+    "macd_signal": lambda c: c.macd_signal(),
+    "macd_hist"  : lambda c: c.macd() - c.macd_signal(),
+    "rsi14"      : lambda c: c.rsi(14),
+    "boll_upper" : lambda c: c.ma(20) + 2 * c.std(20),
+    "boll_mid"   : lambda c: c.ma(20),
+    "boll_lower" : lambda c: c.ma(20) - 2 * c.std(20),
+    "atr14"      : lambda c: c.wilder("trange", c.trange(), 14),
+    "volatility" : lambda c: c.log_return().rolling(20).std() * np.sqrt(252) * 100,
+    }
+
+
+def compute_indicators(df, targets=None):
+    """
+    :param df: 数据源 format_data 格式的 DataFrame
+    :param targets: 需要计算的指标，默认全部
+    :return: 只包含指标列的 DataFrame，与 df 索引相同
+    """
+    targets = [x for x in (targets or INDICATORS) if x in INDICATORS]
+    if df.empty:
+        return pd.DataFrame([], columns=targets)
+    
+    calc = IndicatorCalc(df)
+    return pd.DataFrame({x: INDICATORS[x](calc) for x in targets}, index=df.index)
@@ -15,7 +15,7 @@ import pandas as pd
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
 
 from main.draw_chart.data_source import tiobe, tencent_stock
-from main.util.draw import draw_bar, draw_line, draw_timeline
+from main.util.draw import draw_frame
 
 
 def draw_tiobe():
@@ -26,11 +26,10 @@ def draw_tiobe():
         "yaxis_name": "热度",
         }
     
-    df = tiobe.get_format_data()
-    df = df.replace({np.nan: None})
-    draw_bar(df.index.values.tolist(), df.to_dict("list"), path="test/bar.html", **title)
-    draw_line(df.index.values.tolist(), df.to_dict("list"), path="test/line.html", **title)
-    draw_timeline(df.to_dict("index"), path="test/timeline.html", **title)
+    df = tiobe.get_matrix()
+    draw_frame(df, "bar", path="test/bar.html", **title)
+    draw_frame(df, "line", path="test/line.html", **title)
+    draw_frame(df, "timeline", path="test/timeline.html", **title)
 
 
 def draw_tencent_stock():
@@ -45,10 +44,9 @@ def draw_tencent_stock():
                                            begin_date="2021-04-01",
                                            end_date="2021-04-15",
                                            target="price_range")
-    df = df.replace({np.nan: None})
-    draw_bar(df.index.values.tolist(), df.to_dict("list"), path="test/bar.html", **title)
-    draw_line(df.index.values.tolist(), df.to_dict("list"), path="test/line.html", **title)
-    draw_timeline(df.to_dict("index"), path="test/timeline.html", **title)
+    draw_frame(df, "bar", path="test/bar.html", **title)
+    draw_frame(df, "line", path="test/line.html", **title)
+    draw_frame(df, "timeline", path="test/timeline.html", **title)
 
 
 if __name__ == '__main__':
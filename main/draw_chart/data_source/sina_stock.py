@@ -4,4 +4,169 @@
 # @Time   : 2021/8/14 10:32
 # @Author : wuyazibest
 # @Email  : wuyazibest@163.com
-# @Desc   :
+# @Desc   : 新浪实时行情，一次请求返回多只股票的快照
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from main.util.common import parse_url
+from main.draw_chart.data_source.data_stock import format_stock_code, split_stock_code, compact_frame, BATCH_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# 单次请求的股票数量，避免url过长
+QUOTE_CHUNK_SIZE = 100
+
+
+class SinaStock:
+    url = "http://hq.sinajs.cn/list="
+    columns = ["date", "open", "close", "high", "low", "volume"]
+    # 快照能计算的指标，依赖历史数据的指标不支持
+    targets = ["open", "close", "high", "low", "volume", "amount", "week", "ys_close", "true_range", "price_range"]
+    
+    def __init__(self, headers=None):
+        self.headers = headers or {
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Safari/537.36",
+            # 没有 Referer 时返回 403
+            "Referer"   : "https://finance.sina.com.cn/",
+            }
+    
+    def get_quote_data(self, stock_code, **kwargs):
+        """
+        :param stock_code: 标准化后的股票代码列表
+        :return:
+        var hq_str_sh601318="中国平安,开盘价,昨日收盘价,当前价,最高价,最低价,买一价,卖一价,成交量(股),成交额(元),
+            买一量,买一价,...,卖五量,卖五价,日期,时间,00";
+        股票代码错误时为空字符串
+        """
+        resp = parse_url(self.url + ",".join(stock_code), ret_resp=True, headers=self.headers, **kwargs)
+        if resp is None:
+            return ""
+        return resp.content.decode("gbk", errors="ignore")
+    
+    @staticmethod
+    def format_data(text):
+        """
+        :return: 索引为股票代码的快照 DataFrame
+        """
+        rows = {}
+        for code, value in re.findall(r'hq_str_(\w+)="(.*?)";', text):
+            fields = value.split(",")
+            if len(fields) < 32:
+                continue
+            rows[code] = {
+                "name"    : fields[0],
+                "date"    : fields[30],
+                "time"    : fields[31],
+                "open"    : fields[1],
+                "ys_close": fields[2],
+                "close"   : fields[3],
+                "high"    : fields[4],
+                "low"     : fields[5],
+                # 单位统一为手
+                "volume"  : float(fields[8]) / 100,
+                "amount"  : fields[9],
+                }
+        
+        df = pd.DataFrame.from_dict(rows, orient="index")
+        if df.empty:
+            return df
+        
+        num_columns = ["open", "ys_close", "close", "high", "low", "volume", "amount"]
+        df[num_columns] = df[num_columns].astype(float)
+        # 停牌时开盘价为0，当前价为0
+        suspended = df["close"] == 0
+        for x in ["open", "close", "high", "low"]:
+            df.loc[suspended, x] = df.loc[suspended, "ys_close"]
+        df["week"] = pd.to_datetime(df["date"]).dt.weekday + 1
+        # 涨跌幅
+        df["price_range"] = (df["close"] - df["ys_close"]) / df["ys_close"] * 100
+        # 真实波幅
+        true_range = pd.concat([df["high"], df["ys_close"]], axis=1).max(axis=1) - \
+                     pd.concat([df["low"], df["ys_close"]], axis=1).min(axis=1)
+        df["true_range"] = true_range / df[["close", "low"]].min(axis=1) * 100
+        
+        return df
+
+
+
+# 数据源支持的指标，视图中校验，没有此属性的数据源支持全部指标
+TARGETS = SinaStock.targets
+
+
+def request_quote(stock_code, **kwargs):
+    """
+    分批请求快照，多批时并发
+    :param stock_code: 股票代码列表
+    :return: 索引为标准化股票代码的快照 DataFrame
+    """
+    ss = SinaStock()
+    codes = list(dict.fromkeys(format_stock_code(x) for x in stock_code))
+    chunks = [codes[i:i + QUOTE_CHUNK_SIZE] for i in range(0, len(codes), QUOTE_CHUNK_SIZE)]
+    if not chunks:
+        return pd.DataFrame([])
+    
+    if len(chunks) == 1:
+        texts = [ss.get_quote_data(chunks[0], **kwargs)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(chunks))) as executor:
+            texts = list(executor.map(lambda x: ss.get_quote_data(x, **kwargs), chunks))
+    
+    frames = [ss.format_data(x) for x in texts]
+    frames = [x for x in frames if not x.empty]
+    return pd.concat(frames) if frames else pd.DataFrame([])
+
+
+def batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False, compact=False, cycle="day", **kwargs):
+    """
+    一次请求返回全部股票的当日快照
+    :param begin_date: 快照日期不在区间内时不返回
+    :param end_date:
+    :param target: 指标，只支持 SinaStock.targets
+    :param ret_stat: 是否同时返回每只股票的耗时和状态
+    :param compact: 是否压缩内存占用，见 compact_frame
+    :param cycle: 快照没有周期，忽略
+    :return: 索引为日期，列为股票代码，与其他数据源的 batch_request_stock 相同
+    """
+    stock_code = split_stock_code(stock_code)
+    stat = {}
+    if not stock_code:
+        return (pd.DataFrame([]), stat) if ret_stat else pd.DataFrame([])
+    
+    tt = time.time()
+    error = ""
+    try:
+        quote = request_quote(stock_code, raise_exception=True, **kwargs)
+    except Exception as e:
+        quote, error = pd.DataFrame([]), str(e)
+    elapsed = round(time.time() - tt, 3)
+    
+    series = {}
+    for code in stock_code:
+        key = format_stock_code(code)
+        status, msg = "ok", ""
+        if error:
+            status, msg = "error", error
+        elif key not in quote.index:
+            status = "empty"
+        elif target not in SinaStock.targets:
+            status, msg = "error", f"不支持的指标 {target}"
+        else:
+            row = quote.loc[key]
+            if (begin_date and row["date"] < begin_date) or (end_date and row["date"] > end_date):
+                status = "empty"
+            else:
+                series[code] = pd.Series([round(row[target], 2)], index=pd.Index([row["date"]], name="date"))
+        stat[code] = {"elapsed": elapsed, "status": status, "error": msg}
+    
+    df = pd.DataFrame(series) if series else pd.DataFrame([])
+    df = compact_frame(df) if compact else df
+    return (df, stat) if ret_stat else df
+
+
+if __name__ == '__main__':
+    ret = batch_request_stock(stock_code=["601318", "601238", "688981"], begin_date="", end_date="", target="price_range")
+    print(ret)
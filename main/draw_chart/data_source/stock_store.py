@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : stock_store.py
+# @Time   : 2026/10/18 10:12
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 本地日线存储，只向上游请求缺失的日期区间
+import asyncio
+import datetime
+import functools
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def default_root():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "stock_data")
+
+
+def to_day(date_str):
+    return np.datetime64(str(date_str)[:10], "D")
+
+
+def day_str(day):
+    return str(np.datetime_as_string(day, unit="D"))
+
+
+class StockStore:
+    """
+    每个数据源一个目录，每只股票一个npz文件，按列存储
+    npz内容:
+        columns  数据列名
+        date     交易日 datetime64[D]
+        <column> 每一列的数据
+        covered  已同步过的日期区间 [[begin, end], ...] datetime64[D]
+    covered 记录的是自然日区间，区间内没有数据说明是非交易日
+    """
+    _lock = threading.Lock()
+    
+    def __init__(self, name, root=""):
+        self.name = name
+        self.root = os.path.join(root or default_root(), name)
+    
+    def file_path(self, stock_code):
+        return os.path.join(self.root, f"{stock_code}.npz")
+    
+    def load(self, stock_code):
+        """
+        :return: df, covered
+        df 的索引为 %Y-%m-%d 格式的日期字符串，与数据源 format_data 的结果一致
+        """
+        path = self.file_path(stock_code)
+        if not os.path.exists(path):
+            return pd.DataFrame([]), []
+        
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                columns = npz["columns"].tolist()
+                index = pd.Index(np.datetime_as_string(npz["date"], unit="D"), name="date")
+                df = pd.DataFrame({x: npz[x] for x in columns}, index=index, columns=columns)
+                covered = [tuple(x) for x in npz["covered"]]
+        except Exception as e:
+            logger.error(f"读取本地股票数据失败 {path} error:{e}")
+            return pd.DataFrame([]), []
+        
+        return df, covered
+    
+    def dump(self, stock_code, df, covered):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.file_path(stock_code)
+        data = {x: df[x].to_numpy() for x in df.columns}
+        data["columns"] = np.array(df.columns, dtype=str)
+        data["date"] = np.array(df.index, dtype="datetime64[D]")
+        data["covered"] = np.array(covered, dtype="datetime64[D]").reshape(-1, 2)
+        # 先写临时文件再替换，避免其他进程读到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def merge_covered(covered):
+        ret = []
+        for begin, end in sorted(covered):
+            if ret and begin <= ret[-1][1] + np.timedelta64(1, "D"):
+                ret[-1] = (ret[-1][0], max(ret[-1][1], end))
+            else:
+                ret.append((begin, end))
+        return ret
+    
+    def missing(self, stock_code, begin_date, end_date):
+        """
+        查询区间中还未同步的日期区间，今天之后的日期不会有数据，不再请求
+        :return: [("2021-04-01", "2021-04-15"), ...]
+        """
+        begin, end = to_day(begin_date), min(to_day(end_date), np.datetime64(datetime.date.today(), "D"))
+        if begin > end:
+            return []
+        
+        _, covered = self.load(stock_code)
+        ret = []
+        for c_begin, c_end in self.merge_covered(covered):
+            if c_end < begin:
+                continue
+            if c_begin > end:
+                break
+            if c_begin > begin:
+                ret.append((begin, c_begin - np.timedelta64(1, "D")))
+            begin = max(begin, c_end + np.timedelta64(1, "D"))
+            if begin > end:
+                break
+        ret.append((begin, end))
+        
+        return [(day_str(x), day_str(y)) for x, y in ret if x <= y]
+    
+    def checked_path(self, stock_code):
+        return os.path.join(self.root, f"{stock_code}.checked")
+    
+    def is_checked(self, stock_code):
+        """
+        今天是否已校验过复权
+        """
+        path = self.checked_path(stock_code)
+        if not os.path.exists(path):
+            return False
+        with open(path) as f:
+            return f.read().strip() == str(datetime.date.today())
+    
+    def mark_checked(self, stock_code):
+        if not os.path.exists(self.root):
+            return
+        with open(self.checked_path(stock_code), "w") as f:
+            f.write(str(datetime.date.today()))
+    
+    def last_date_before(self, stock_code, date_str):
+        df, _ = self.load(stock_code)
+        if df.empty:
+            return ""
+        index = df.index[df.index < str(date_str)]
+        return index[-1] if len(index) else ""
+    
+    def save(self, stock_code, df, begin_date, end_date, anchor_date=""):
+        """
+        合并新数据并记录已同步区间
+        当天的行情还会变化，不记为已同步
+        :param anchor_date: 与新数据重叠的已存储交易日，收盘价不一致时说明发生了复权，清空旧数据
+        :return: 是否发生了复权重置
+        """
+        today = np.datetime64(datetime.date.today(), "D")
+        begin, end = to_day(begin_date), min(to_day(end_date), today - np.timedelta64(1, "D"))
+        
+        with self._lock:
+            stored, covered = self.load(stock_code)
+            if stored.empty and df.empty and not covered:
+                # 股票代码错误等情况不生成文件
+                return False
+            
+            reset = False
+            if anchor_date and anchor_date in stored.index and not df.empty and anchor_date in df.index:
+                if not np.isclose(stored.at[anchor_date, "close"], float(df.at[anchor_date, "close"])):
+                    logger.info(f"本地股票数据已复权，重新同步 {self.name} {stock_code}")
+                    stored, covered, reset = pd.DataFrame([]), [], True
+            
+            if not df.empty:
+                df = df.copy()
+                df.index = df.index.astype(str)
+                df.index.name = "date"
+                stored = pd.concat([stored, df]) if not stored.empty else df
+                stored = stored[~stored.index.duplicated(keep="last")].sort_index()
+            if begin <= end:
+                covered = self.merge_covered([*covered, (begin, end)])
+            
+            self.dump(stock_code, stored, covered)
+        
+        return reset
+    
+    def read(self, stock_code, begin_date, end_date):
+        df, _ = self.load(stock_code)
+        if df.empty:
+            return df
+        
+        # 日期字符串已排序，二分查找切片
+        left = df.index.searchsorted(str(begin_date), side="left")
+        right = df.index.searchsorted(str(end_date), side="right")
+        return df.iloc[left:right]
+
+
+def check_anchor(store, stock_code, end_date):
+    """
+    查询区间已全部同步时，每只股票每天用区间内最后一个已存储交易日校验一次复权
+    :return: 需要校验的交易日，不需要时为空
+    """
+    if store.is_checked(stock_code):
+        return ""
+    return store.last_date_before(stock_code, day_str(to_day(end_date) + np.timedelta64(1, "D")))
+
+
+def fetch_with_store(store, stock_code, begin_date, end_date, fetch_fn):
+    """
+    只向上游请求本地缺失的日期区间，然后从本地读取查询区间的数据
+    :param store: StockStore
+    :param stock_code: 标准化后的股票代码
+    :param begin_date:
+    :param end_date:
+    :param fetch_fn: fetch_fn(begin_date, end_date) 返回 format_data 格式的 DataFrame，请求失败时抛出异常
+    :return:
+    """
+    for _ in range(2):
+        reset = False
+        missing = store.missing(stock_code, begin_date, end_date)
+        for begin, end in missing:
+            # 多取一个已存储的交易日，用于判断是否发生复权
+            anchor = store.last_date_before(stock_code, begin)
+            try:
+                df = fetch_fn(anchor or begin, end)
+            except Exception as e:
+                logger.error(f"同步股票数据失败 {store.name} {stock_code} {begin}~{end} error:{e}")
+                continue
+            reset = store.save(stock_code, df, begin, end, anchor_date=anchor) or reset
+            if anchor:
+                store.mark_checked(stock_code)
+        
+        anchor = "" if missing else check_anchor(store, stock_code, end_date)
+        if anchor:
+            try:
+                df = fetch_fn(anchor, anchor)
+                reset = store.save(stock_code, df, anchor, anchor, anchor_date=anchor) or reset
+                store.mark_checked(stock_code)
+            except Exception as e:
+                logger.error(f"校验股票复权失败 {store.name} {stock_code} {anchor} error:{e}")
+        
+        if not reset:
+            break
+    
+    return store.read(stock_code, begin_date, end_date)
+
+
+async def async_fetch_with_store(store, stock_code, begin_date, end_date, fetch_fn):
+    """
+    fetch_with_store 的异步版本，fetch_fn 为协程函数，缺失区间并发请求
+    读写 npz 文件在线程池中执行，不阻塞事件循环
+    """
+    loop = asyncio.get_event_loop()
+    
+    def run(fn, *args, **kwargs):
+        return loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+    
+    async def fetch(begin, end):
+        anchor = await run(store.last_date_before, stock_code, begin)
+        try:
+            return begin, end, anchor, await fetch_fn(anchor or begin, end)
+        except Exception as e:
+            logger.error(f"同步股票数据失败 {store.name} {stock_code} {begin}~{end} error:{e}")
+            return begin, end, anchor, None
+    
+    def save_all(ret):
+        reset = False
+        for begin, end, anchor, df in ret:
+            if df is not None:
+                reset = store.save(stock_code, df, begin, end, anchor_date=anchor) or reset
+                if anchor:
+                    store.mark_checked(stock_code)
+        return reset
+    
+    def get_missing():
+        missing = store.missing(stock_code, begin_date, end_date)
+        if not missing:
+            anchor = check_anchor(store, stock_code, end_date)
+            missing = [(anchor, anchor)] if anchor else []
+        return missing
+    
+    for _ in range(2):
+        missing = await run(get_missing)
+        ret = await asyncio.gather(*[fetch(x, y) for x, y in missing])
+        if not await run(save_all, ret):
+            break
+    
+    return await run(store.read, stock_code, begin_date, end_date)
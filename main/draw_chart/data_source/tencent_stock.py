@@ -6,17 +6,25 @@
 # @Email  : wuyazibest@163.com
 # @Desc   :
 
+import asyncio
+import datetime
 import json
 import logging
 import time
 import numpy as np
 import pandas as pd
 
+from main.config import STOCK_USE_ASYNC
 from main.util.common import parse_url
-from main.draw_chart.data_source.data_stock import talib_format, format_stock_code
+from main.util.async_http import async_parse_url, run_sync, gevent_patched
+from main.draw_chart.data_source.data_stock import RESAMPLE_FREQ, format_stock_code, format_target, compact_frame, resample_data, batch_request, async_batch_request
+from main.draw_chart.data_source.stock_store import StockStore, fetch_with_store, async_fetch_with_store
 
 logger = logging.getLogger(__name__)
 
+# 同步本地存储时单次请求的自然日天数
+STORE_FETCH_DAYS = 500
+
 
 class TencentStock:
     columns = ["date", "open", "close", "high", "low", "volume"]
@@ -54,6 +62,29 @@ class TencentStock:
         ]
         """
         
+        url, params = self.daily_params(stock_code, cycle, begin_date, end_date, date_num, fq_type)
+        resp = parse_url(url, params=params, headers=self.headers, **kwargs)
+        
+        return self.daily_result(resp, stock_code, cycle)
+    
+    async def async_get_daily_data(self,
+                                   stock_code,
+                                   cycle="day",
+                                   begin_date="",
+                                   end_date="",
+                                   date_num=100,
+                                   fq_type="qfd",
+                                   **kwargs):
+        """
+        get_daily_data 的异步版本
+        """
+        url, params = self.daily_params(stock_code, cycle, begin_date, end_date, date_num, fq_type)
+        resp = await async_parse_url(url, params=params, headers=self.headers, **kwargs)
+        
+        return self.daily_result(resp, stock_code, cycle)
+    
+    @staticmethod
+    def daily_params(stock_code, cycle, begin_date, end_date, date_num, fq_type):
         # url = "https://proxy.finance.qq.com/ifzqgtimg/appstock/app/newfqkline/get"
         url = "https://web.ifzq.gtimg.cn/appstock/app/fqkline/get"
         # usAAPL.OQ 股票代码，这里是us是美股，AAPL是苹果，“.OQ”是美股拼接后缀，其他不需要拼接  上海sh 深圳sz 香港hk
@@ -66,8 +97,11 @@ class TencentStock:
         params = {
             "param": f"{stock_code},{cycle},{begin_date},{end_date},{date_num},{fq_type}"
             }
-        resp = parse_url(url, params=params, headers=self.headers, **kwargs)
-        
+        return url, params
+    
+    @staticmethod
+    def daily_result(resp, stock_code, cycle):
+        stock_code = format_stock_code(stock_code)
         if resp.get("code") is not 0:
             logger.error(resp.get("msg", ""))
         
@@ -86,47 +120,146 @@ class TencentStock:
         return df
 
 
-def request_stock(stock_code, begin_date, end_date, target=None, **kwargs):
+def store_sections(begin, end):
+    """
+    同步本地存储时分段请求，避免区间过长时超过接口的条数限制
+    """
+    begin, end = datetime.date.fromisoformat(begin), datetime.date.fromisoformat(end)
+    while begin <= end:
+        section_end = min(begin + datetime.timedelta(days=STORE_FETCH_DAYS - 1), end)
+        yield begin.isoformat(), section_end.isoformat()
+        begin = section_end + datetime.timedelta(days=1)
+
+
+def load_daily_data(stock_code, begin_date, end_date, date_num=100, fq_type="qfd", **kwargs):
+    """
+    日线数据优先从本地存储读取，只向上游请求缺失的日期区间
+    """
+    ts = TencentStock()
+    stock_code = format_stock_code(stock_code)
+    
+    def fetch(begin, end):
+        frames = []
+        for section_begin, section_end in store_sections(begin, end):
+            data = ts.get_daily_data(stock_code=stock_code,
+                                     begin_date=section_begin,
+                                     end_date=section_end,
+                                     date_num=STORE_FETCH_DAYS,
+                                     fq_type=fq_type,
+                                     raise_exception=True,
+                                     **kwargs)
+            if data:
+                frames.append(ts.format_data(data))
+        return pd.concat(frames) if frames else pd.DataFrame([])
+    
+    df = fetch_with_store(StockStore(f"tencent_{fq_type}"), stock_code, begin_date, end_date, fetch)
+    # 接口从结束时间倒退返回 date_num 条数据
+    return df.iloc[-date_num:] if date_num else df
+
+
+async def async_load_daily_data(stock_code, begin_date, end_date, date_num=100, fq_type="qfd", **kwargs):
+    """
+    load_daily_data 的异步版本，分段请求并发进行
+    """
+    ts = TencentStock()
+    stock_code = format_stock_code(stock_code)
+    
+    async def fetch(begin, end):
+        ret = await asyncio.gather(*[
+            ts.async_get_daily_data(stock_code=stock_code,
+                                    begin_date=section_begin,
+                                    end_date=section_end,
+                                    date_num=STORE_FETCH_DAYS,
+                                    fq_type=fq_type,
+                                    raise_exception=True,
+                                    **kwargs)
+            for section_begin, section_end in store_sections(begin, end)
+            ])
+        frames = [ts.format_data(data) for data in ret if data]
+        return pd.concat(frames) if frames else pd.DataFrame([])
+    
+    df = await async_fetch_with_store(StockStore(f"tencent_{fq_type}"), stock_code, begin_date, end_date, fetch)
+    return df.iloc[-date_num:] if date_num else df
+
+
+def request_stock(stock_code, begin_date, end_date, target=None, use_store=True, compact=False, **kwargs):
+    """
+    :param use_store: 是否使用本地存储，周线、月线、季线由本地日线聚合
+    :param compact: 是否压缩内存占用，见 compact_frame
+    """
     pd.set_option('display.float_format', lambda x: str(x))
     ts = TencentStock()
-    data = ts.get_daily_data(stock_code=stock_code, begin_date=begin_date, end_date=end_date, **kwargs)
-    if not data:
+    cycle = kwargs.pop("cycle", "day")
+    if use_store and begin_date and end_date and cycle in ["day", *RESAMPLE_FREQ]:
+        # 周期数据由本地日线聚合，不再请求上游
+        date_num = kwargs.pop("date_num", 100)
+        df = load_daily_data(stock_code, begin_date, end_date, date_num=None, **kwargs)
+        df = resample_data(df, cycle)
+        # 接口从结束时间倒退返回 date_num 条数据
+        df = df.iloc[-date_num:] if date_num else df
+    else:
+        # 接口不支持季线，由月线聚合
+        data = ts.get_daily_data(stock_code=stock_code,
+                                 begin_date=begin_date,
+                                 end_date=end_date,
+                                 cycle="month" if cycle == "quarter" else cycle,
+                                 **kwargs)
+        df = resample_data(ts.format_data(data), cycle) if data else pd.DataFrame([])
+    
+    if df.empty:
+        return pd.DataFrame([])
+    
+    df = format_target(df, ts.columns, stock_code, target)
+    return compact_frame(df) if compact else df
+
+
+async def async_request_stock(stock_code, begin_date, end_date, target=None, use_store=True, compact=False, **kwargs):
+    """
+    request_stock 的异步版本
+    """
+    ts = TencentStock()
+    cycle = kwargs.pop("cycle", "day")
+    if use_store and begin_date and end_date and cycle in ["day", *RESAMPLE_FREQ]:
+        # 周期数据由本地日线聚合，不再请求上游
+        date_num = kwargs.pop("date_num", 100)
+        df = await async_load_daily_data(stock_code, begin_date, end_date, date_num=None, **kwargs)
+        df = resample_data(df, cycle)
+        # 接口从结束时间倒退返回 date_num 条数据
+        df = df.iloc[-date_num:] if date_num else df
+    else:
+        # 接口不支持季线，由月线聚合
+        data = await ts.async_get_daily_data(stock_code=stock_code,
+                                             begin_date=begin_date,
+                                             end_date=end_date,
+                                             cycle="month" if cycle == "quarter" else cycle,
+                                             **kwargs)
+        df = resample_data(ts.format_data(data), cycle) if data else pd.DataFrame([])
+    
+    if df.empty:
         return pd.DataFrame([])
     
-    df = ts.format_data(data)
+    df = format_target(df, ts.columns, stock_code, target)
+    return compact_frame(df) if compact else df
+
+
+def batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False, use_async=STOCK_USE_ASYNC, **kwargs):
+    """
+    :param ret_stat: 是否同时返回每只股票的耗时和状态
+    :param use_async: 是否在事件循环中并发请求，否则使用线程池，gevent 补丁后始终使用线程池
+    kwargs 传给 request_stock，如 compact=True 压缩内存占用
+    """
+    if use_async and not gevent_patched():
+        df, stat = run_sync(async_batch_request(async_request_stock, stock_code, begin_date, end_date, target, **kwargs))
+    else:
+        df, stat = batch_request(request_stock, stock_code, begin_date, end_date, target, **kwargs)
     
-    columns_name = [
-        *ts.columns,
-        "week",
-        "ys_close",
-        "true_range",
-        "price_range",
-        ]
-    # 昨日收盘价
-    df["ys_close"] = df["close"].shift(1)
-    # 真实波幅
-    df["true_range"] = talib_format("TRANGE", df["high"], df["low"], df["close"]) / df[["close", "low"]].min(axis=1) * 100
-    # 涨跌幅
-    df["price_range"] = (df["close"] - df["ys_close"]) / df["ys_close"] * 100
-    # 保留小数位
-    df = df.round(2)
-    # 填充nan
-    # df = df.fillna(0)
-    # df = df.replace({np.nan: None})
-    
-    if target and target in columns_name:
-        df = df[[target]]
-        df = df.rename(columns={target: stock_code})
-    
-    return df
-
-
-def batch_request_stock(stock_code, begin_date, end_date, target, **kwargs):
-    df = pd.DataFrame([])
-    for i in stock_code:
-        df = pd.concat([df, request_stock(i, begin_date, end_date, target, **kwargs)], join='outer', axis=1)
-    
-    return df
+    return (df, stat) if ret_stat else df
+
+
+async def async_batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False, **kwargs):
+    df, stat = await async_batch_request(async_request_stock, stock_code, begin_date, end_date, target, **kwargs)
+    
+    return (df, stat) if ret_stat else df
 
 
 if __name__ == '__main__':
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_auto_stock.py
+# @Time   : 2026/10/19 10:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from main.draw_chart.data_source import auto_stock
+
+DATES = [f"2021-04-{x:02d}" for x in range(1, 11)]
+
+
+def stub_provider(name, delay=0, error=False, empty=False):
+    def request_stock(stock_code, begin_date, end_date, target=None, date_num=100, **kwargs):
+        time.sleep(delay)
+        if error:
+            raise IOError(f"{name} error")
+        if empty:
+            return pd.DataFrame([])
+        df = pd.DataFrame({"close": range(len(DATES)), "open": name}, index=DATES)
+        # 与凤凰相同，从前截取
+        return df.iloc[:date_num + 1] if date_num is not None else df
+    
+    return SimpleNamespace(request_stock=request_stock)
+
+
+class TestAutoStock(object):
+    @pytest.mark.parametrize("primary", [
+        {"delay": 1},
+        {"error": True},
+        {"empty": True},
+        ])
+    def test_hedge(self, monkeypatch, primary):
+        monkeypatch.setattr(auto_stock, "PROVIDERS", {"tencent": stub_provider("tencent", **primary),
+                                                      "ifeng"  : stub_provider("ifeng")})
+        tt = time.time()
+        df = auto_stock.request_stock("600000", "2021-04-01", "2021-04-10", hedge_delay=0.05, date_num=3)
+        assert time.time() - tt < 0.5
+        assert df["open"].tolist() == ["ifeng"] * 3
+        # 两个数据源截取的区间相同，都为最后 date_num 条
+        assert df.index.tolist() == DATES[-3:]
+        assert list(df.columns) == ["open", "close"]
+    
+    def test_prefer(self):
+        with pytest.raises(ValueError):
+            auto_stock.request_stock("600000", "2021-04-01", "2021-04-10", prefer="unknown")
+        with pytest.raises(ValueError):
+            auto_stock.batch_request_stock("600000", "2021-04-01", "2021-04-10", "close", prefer="unknown")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_data_stock.py
+# @Time   : 2026/10/19 16:20
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from main.draw_chart.data_source.data_stock import batch_request
+
+
+class TestBatchRequest(object):
+    def test_timeout_cancel(self):
+        release = threading.Event()
+        called = []
+        
+        def request_fn(stock_code, begin_date, end_date, target):
+            called.append(stock_code)
+            release.wait(5)
+            return pd.DataFrame({stock_code: [1.0]}, index=[begin_date])
+        
+        df, stat = batch_request(request_fn, "a,b,c", "2021-04-01", "2021-04-02", "close",
+                                 max_workers=1, wait_timeout=0.2)
+        assert df.empty and [x["status"] for x in stat.values()] == ["timeout"] * 3
+        release.set()
+        time.sleep(0.2)
+        # 排队中的请求已取消，不会在返回后继续执行
+        assert called == ["a"]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_indicator.py
+# @Time   : 2026/10/18 17:50
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import numpy as np
+import pandas as pd
+
+from main.draw_chart.data_source.data_stock import format_target, compact_frame, resample_data
+from main.draw_chart.data_source.indicator import INDICATORS, compute_indicators
+
+
+def make_df(n=60):
+    rng = np.random.RandomState(0)
+    close = 10 + rng.randn(n).cumsum() * 0.1
+    index = pd.Index(pd.date_range("2021-01-01", periods=n).strftime("%Y-%m-%d"), name="date")
+    return pd.DataFrame({
+        "open"  : close + 0.05,
+        "close" : close,
+        "high"  : close + 0.2,
+        "low"   : close - 0.2,
+        "volume": rng.randint(1000, 2000, n),
+        }, index=index)
+
+
+class TestIndicator(object):
+    df = make_df()
+    
+    def test_all(self):
+        ret = compute_indicators(self.df)
+        assert list(ret.columns) == list(INDICATORS)
+        assert ret.index.equals(self.df.index)
+    
+    def test_trange(self):
+        ret = compute_indicators(self.df, ["true_range"])["true_range"]
+        high, low, ys_close = self.df["high"], self.df["low"], self.df["close"].shift(1)
+        expect = pd.concat([high - low, (high - ys_close).abs(), (low - ys_close).abs()], axis=1).max(axis=1)
+        expect = expect / self.df[["close", "low"]].min(axis=1) * 100
+        assert np.isnan(ret.iloc[0])
+        assert np.allclose(ret.iloc[1:], expect.iloc[1:])
+    
+    def test_ma_boll(self):
+        ret = compute_indicators(self.df, ["ma5", "boll_upper", "boll_mid", "boll_lower"])
+        assert ret["ma5"].iloc[:4].isna().all()
+        assert np.isclose(ret["ma5"].iloc[4], self.df["close"].iloc[:5].mean())
+        width = 2 * self.df["close"].iloc[:20].std(ddof=0)
+        assert np.isclose(ret["boll_upper"].iloc[19] - ret["boll_mid"].iloc[19], width)
+        assert np.isclose(ret["boll_mid"].iloc[19] - ret["boll_lower"].iloc[19], width)
+    
+    def test_macd_rsi(self):
+        ret = compute_indicators(self.df, ["macd", "macd_signal", "macd_hist", "rsi14"])
+        assert np.allclose(ret["macd_hist"], ret["macd"] - ret["macd_signal"])
+        assert ret["rsi14"].dropna().between(0, 100).all()
+        
+        up = make_df()
+        up["close"] = np.arange(len(up), dtype=float)
+        assert (compute_indicators(up, ["rsi14"])["rsi14"].dropna() == 100).all()
+    
+    def test_format_target(self):
+        ret = format_target(self.df, ["date", "open", "close", "high", "low", "volume"], "sh600000", "atr14")
+        assert list(ret.columns) == ["sh600000"]
+        ret = format_target(self.df, ["date", "open", "close", "high", "low", "volume"], "sh600000")
+        assert set(INDICATORS) < set(ret.columns)
+    
+    def test_compact(self):
+        df = format_target(self.df.assign(week=1), ["date", "open", "close", "high", "low", "volume"], "sh600000")
+        ret = compact_frame(df)
+        assert ret["close"].dtype == np.float32
+        assert ret["volume"].dtype == np.int16
+        assert ret["week"].dtype == np.int8
+        assert ret.index.dtype == "datetime64[ns]"
+        assert ret.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum() / 2
+    
+    def test_resample(self):
+        ret = resample_data(self.df, "week")
+        # 2021-01-01 为周五
+        assert ret.index[0] == "2021-01-03"
+        first_week = self.df.loc["2021-01-04":"2021-01-10"]
+        row = ret.loc["2021-01-10"]
+        assert row["open"] == first_week["open"].iloc[0]
+        assert row["close"] == first_week["close"].iloc[-1]
+        assert row["high"] == first_week["high"].max()
+        assert row["low"] == first_week["low"].min()
+        assert row["volume"] == first_week["volume"].sum()
+        assert len(resample_data(self.df, "month")) == 3
+        assert resample_data(resample_data(self.df, "month"), "quarter").equals(resample_data(self.df, "quarter"))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_sina_stock.py
+# @Time   : 2026/10/18 19:10
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+
+import pytest
+
+from main.draw_chart.data_source import sina_stock
+from main.draw_chart.data_source.sina_stock import SinaStock
+
+QUOTES = {
+    "sh601318": "中国平安,50.00,49.00,51.00,52.00,48.00,50.99,51.01,1234500,62000000.00,"
+                + "0," * 20 + "2021-04-15,15:00:00,00",
+    "sz000001": "平安银行,20.00,20.00,19.00,20.50,18.50,18.99,19.01,1000000,19000000.00,"
+                + "0," * 20 + "2021-04-15,15:00:00,00",
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests = []
+    
+    def do_GET(self):
+        self.requests.append(self.path)
+        if "finance.sina.com.cn" not in self.headers.get("Referer", ""):
+            self.send_response(403)
+            self.end_headers()
+            return
+        
+        codes = unquote(self.path.split("list=", 1)[1]).split(",")
+        body = "\n".join(f'var hq_str_{x}="{QUOTES.get(x, "")}";' for x in codes).encode("gbk")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/javascript; charset=GBK")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_server(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(SinaStock, "url", f"http://127.0.0.1:{server.server_port}/list=")
+    StubHandler.requests = []
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestSinaStock(object):
+    def test_batch(self, stub_server):
+        df, stat = sina_stock.batch_request_stock("601318,000001,600000", "2021-04-01", "2021-04-15", "price_range",
+                                                  ret_stat=True)
+        assert len(StubHandler.requests) == 1
+        assert list(df.columns) == ["601318", "000001"]
+        assert df.loc["2021-04-15", "601318"] == 4.08
+        assert df.loc["2021-04-15", "000001"] == -5.0
+        assert stat["600000"]["status"] == "empty"
+    
+    def test_chunk(self, stub_server, monkeypatch):
+        monkeypatch.setattr(sina_stock, "QUOTE_CHUNK_SIZE", 1)
+        df = sina_stock.batch_request_stock(["601318", "000001"], "", "", "volume")
+        assert len(StubHandler.requests) == 2
+        assert df.loc["2021-04-15", "601318"] == 12345
+    
+    def test_format(self):
+        df = SinaStock.format_data(f'var hq_str_sh601318="{QUOTES["sh601318"]}";\nvar hq_str_sh600000="";')
+        assert list(df.index) == ["sh601318"]
+        assert df.at["sh601318", "name"] == "中国平安"
+        assert df.at["sh601318", "week"] == 4
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_stock_store.py
+# @Time   : 2026/10/19 10:00
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import os
+
+import pandas as pd
+
+from main.draw_chart.data_source.stock_store import StockStore, fetch_with_store, async_fetch_with_store
+from main.util.async_http import run_sync
+
+
+class TestStockStore(object):
+    def test_check_anchor(self, tmp_path):
+        store = StockStore("stub", str(tmp_path))
+        closes = {"2021-04-01": 10.0, "2021-04-02": 11.0, "2021-04-06": 12.0, "2021-04-07": 13.0}
+        calls = []
+        
+        def fetch(begin, end):
+            calls.append((begin, end))
+            return pd.DataFrame({"close": {k: v for k, v in closes.items() if begin <= k <= end}})
+        
+        df = fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-07", fetch)
+        assert df["close"].tolist() == [10.0, 11.0, 12.0, 13.0] and calls == [("2021-04-01", "2021-04-07")]
+        # 已全部同步，当天校验一次最后一个交易日
+        fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-07", fetch)
+        fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-07", fetch)
+        assert calls[1:] == [("2021-04-07", "2021-04-07")]
+        
+        # 第二天发生复权，重新同步
+        closes = {k: v * 0.9 for k, v in closes.items()}
+        os.remove(store.checked_path("sh600000"))
+        df = fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-07", fetch)
+        assert calls[2:] == [("2021-04-07", "2021-04-07"), ("2021-04-01", "2021-04-06")]
+        assert df["close"].tolist() == [x * 0.9 for x in [10.0, 11.0, 12.0, 13.0]]
+    
+    def test_async(self, tmp_path):
+        store = StockStore("stub", str(tmp_path))
+        calls = []
+        
+        async def fetch(begin, end):
+            calls.append((begin, end))
+            return pd.DataFrame({"close": {"2021-04-01": 10.0, "2021-04-02": 11.0}})
+        
+        df = run_sync(async_fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-02", fetch))
+        assert df["close"].tolist() == [10.0, 11.0]
+        run_sync(async_fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-02", fetch))
+        run_sync(async_fetch_with_store(store, "sh600000", "2021-04-01", "2021-04-02", fetch))
+        # 第二次校验复权，第三次不再请求
+        assert len(calls) == 2
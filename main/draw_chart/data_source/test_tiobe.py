@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_tiobe.py
+# @Time   : 2026/10/19 11:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+from types import SimpleNamespace
+
+from main.draw_chart.data_source import tiobe
+
+
+def page(*points):
+    return "".join(f"{{name : '{x}',data : [[Date.UTC({y}), {z}]]}}" for x, y, z in points)
+
+
+class TestTiobe(object):
+    def test_refresh(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "language_data.xlsx")
+        responses, requests = [], []
+        
+        def parse_url(url, headers=None, **kwargs):
+            requests.append(headers)
+            status_code, etag, text = responses.pop(0)
+            return SimpleNamespace(status_code=status_code, headers={"ETag": etag}, text=text)
+        
+        monkeypatch.setattr(tiobe, "parse_url", parse_url)
+        
+        responses.append((200, '"v1"', page(("Python", "2021, 3, 1", 11.2), ("C", "2021, 3, 1", 12.5))))
+        assert tiobe.refresh(path) == (2, 1)
+        
+        # 未修改
+        responses.append((304, "", ""))
+        assert tiobe.refresh(path) == (0, 1)
+        assert requests[-1]["If-None-Match"] == '"v1"'
+        
+        # 只追加新数据
+        responses.append((200, '"v2"', page(("Python", "2021, 3, 1", 11.2), ("Python", "2021, 4, 1", 11.9))))
+        assert tiobe.refresh(path) == (1, 2)
+        assert tiobe.load_matrix(tiobe.matrix_path(path)).at["2021-05-01", "Python"] == 11.9
+        
+        # 没有解析到数据时不保存 etag
+        responses.append((200, '"v3"', "<html></html>"))
+        assert tiobe.refresh(path) == (0, 2)
+        assert tiobe.load_meta(path)["etag"] == '"v2"'
+        responses.append((304, "", ""))
+        tiobe.refresh(path)
+        assert requests[-1]["If-None-Match"] == '"v2"'
@@ -7,8 +7,10 @@
 # @Desc   :
 
 import datetime
+import json
 import logging
 import os
+import threading
 
 import requests
 import re
@@ -18,13 +20,26 @@ import pandas as pd
 # from lxml import etree
 from openpyxl import Workbook, load_workbook
 
+from main.util.common import parse_url
+
 logger = logging.getLogger(__name__)
 
+# 进程内缓存的热度矩阵 {"mtime": npz文件修改时间, "df": DataFrame}
+_matrix_cache = {}
+_matrix_lock = threading.Lock()
+
 
 def default_path():
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_data.xlsx")
 
 
+def matrix_path(path=""):
+    """
+    与xlsx同目录的npz文件，保存透视后的热度矩阵
+    """
+    return os.path.splitext(path or default_path())[0] + ".npz"
+
+
 def transform_local_time(utc_time_str):
     try:
         split_char = ", "
@@ -38,17 +53,36 @@ def transform_local_time(utc_time_str):
         return utc_time_str
 
 
-def request_tiobe():
+def request_tiobe(meta=None):
+    """
+    :param meta: 上次请求返回的 etag / last_modified，传入时发送条件请求
+    :return: data, validators 页面未修改时 data 为 None
+    """
+    meta = meta or {}
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
         }
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
     url = 'https://www.tiobe.com/tiobe-index/'
-    resp = requests.get(url, headers=headers).text
+    resp = parse_url(url, raise_exception=True, ret_resp=True, headers=headers)
+    validators = {
+        "etag"         : resp.headers.get("ETag", ""),
+        "last_modified": resp.headers.get("Last-Modified", ""),
+        }
+    if resp.status_code == 304:
+        return None, {k: v or meta.get(k, "") for k, v in validators.items()}
     
-    # html = etree.HTML(resp)
+    return parse_data(resp.text), validators
+
+
+def parse_data(html):
+    # html = etree.HTML(html)
     # data = html.xpath("//article/script[2]")
     # 正则匹配提取数据
-    match = re.findall(r"\{name : '(.*?)',data : (.*?)\}", resp)
+    match = re.findall(r"\{name : '(.*?)',data : (.*?)\}", html)
     data = []
     for i in match:
         data.extend([[i[0], transform_local_time(x[0]), x[1]] for x in re.findall(r'\[Date.UTC\((.*?)\), (.*?)\]', i[1], re.S)])
@@ -64,6 +98,95 @@ def save(data, path=""):
     for i in data:
         sheet.append(i)
     exl.save(path)
+    save_matrix(pivot_data(data), matrix_path(path))
+
+
+def append(data, path=""):
+    """
+    只追加本地没有的 (语言, 日期) 数据
+    :return: 新增的条数
+    """
+    path = path or default_path()
+    if not os.path.exists(path):
+        save(data, path)
+        return len(data)
+    
+    stored = load_matrix(matrix_path(path)) if os.path.exists(matrix_path(path)) else pivot_data(reader(path))
+    # (日期, 语言)
+    keys = set(stored.stack().index)
+    new = []
+    for i in data:
+        if (i[1], i[0]) not in keys:
+            keys.add((i[1], i[0]))
+            new.append(i)
+    if not new:
+        return 0
+    
+    exl = load_workbook(filename=path)
+    sheet = exl.active
+    for i in new:
+        sheet.append(i)
+    exl.save(path)
+    save_matrix(stored.combine_first(pivot_data(new)), matrix_path(path))
+    
+    return len(new)
+
+
+def meta_path(path=""):
+    """
+    与xlsx同目录的json文件，保存条件请求的 etag / last_modified 和数据版本号
+    """
+    return os.path.splitext(path or default_path())[0] + ".json"
+
+
+def load_meta(path=""):
+    path = meta_path(path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf8") as f:
+        return json.load(f)
+
+
+def save_meta(meta, path=""):
+    path = meta_path(path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def get_version():
+    """
+    数据版本号，每次有新数据时加1，用于区分缓存
+    """
+    try:
+        return load_meta().get("version", 0)
+    except Exception as e:
+        logger.error(f"读取tiobe数据版本失败 error:{e}")
+        return 0
+
+
+def refresh(path=""):
+    """
+    条件请求tiobe页面，只追加新数据
+    页面返回了但没有解析到数据时(页面结构变化、内容不完整)不保存 etag，下次重新请求完整页面
+    :return: 新增的条数, 版本号
+    """
+    meta = load_meta(path)
+    data, validators = request_tiobe(meta)
+    if data is not None and not data:
+        logger.warning(f"tiobe页面未解析到数据 validators:{validators}")
+        return 0, meta.get("version", 0)
+    
+    count = append(data, path) if data else 0
+    if count:
+        meta["version"] = meta.get("version", 0) + 1
+        meta["updated_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if count or validators != {k: meta.get(k, "") for k in validators}:
+        meta.update(validators)
+        save_meta(meta, path)
+    
+    return count, meta.get("version", 0)
 
 
 def reader(path=""):
@@ -73,20 +196,63 @@ def reader(path=""):
     return tuple(sheet.values)[1:]
 
 
-def get_format_data():
-    pd.set_option('display.float_format', lambda x: str(x))
-    data = reader()
+def pivot_data(data):
+    """
+    :return: 索引为日期，列为编程语言的热度矩阵 float
+    """
     df = pd.DataFrame(data, columns=['programing', 'date', 'data_per'])
     df = df.pivot('date', 'programing', 'data_per')
     df = df.astype("float")
     df = df.round(2)
+    return df
+
+
+def save_matrix(df, path=""):
+    path = path or matrix_path()
+    # 先写临时文件再替换，避免其他进程读到写了一半的文件
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f,
+                 index=np.array(df.index, dtype=str),
+                 columns=np.array(df.columns, dtype=str),
+                 values=df.to_numpy(dtype="float64"))
+    os.replace(tmp_path, path)
+
+
+def load_matrix(path=""):
+    with np.load(path or matrix_path(), allow_pickle=False) as npz:
+        return pd.DataFrame(npz["values"],
+                            index=pd.Index(npz["index"], name="date"),
+                            columns=pd.Index(npz["columns"], name="programing"))
+
+
+def get_matrix():
+    """
+    热度矩阵缓存在进程内，npz文件修改后重新加载
+    npz文件不存在或比xlsx旧时从xlsx生成
+    """
+    path = matrix_path()
+    xlsx_mtime = os.path.getmtime(default_path()) if os.path.exists(default_path()) else 0
+    if not os.path.exists(path) or os.path.getmtime(path) < xlsx_mtime:
+        save_matrix(pivot_data(reader()), path)
+    
+    mtime = os.path.getmtime(path)
+    with _matrix_lock:
+        if _matrix_cache.get("mtime") != mtime:
+            _matrix_cache.update(mtime=mtime, df=load_matrix(path))
+        return _matrix_cache["df"]
+
+
+def get_format_data():
+    pd.set_option('display.float_format', lambda x: str(x))
+    df = get_matrix()
     df = df.replace({np.nan: None})
     # df.to_dict()
     return df
 
 
 if __name__ == '__main__':
-    # data = request_tiobe()
+    # data, _ = request_tiobe()
     # save(data)
     reader()
     ret = get_format_data()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_dashboard.py
+# @Time   : 2026/10/19 17:20
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import datetime
+import types
+
+import pandas as pd
+import pytest
+
+from main.draw_chart import dashboard
+from main.draw_chart.dashboard import unsupported_targets, stock_frame, stock_version
+
+
+class TestDashboard(object):
+    def test_unsupported_targets(self):
+        # 新浪快照不能计算依赖历史数据的指标
+        assert unsupported_targets("sina", ["close", "price_range", "ma5", "rsi14"]) == ["ma5", "rsi14"]
+        assert unsupported_targets("tencent", ["close", "ma5"]) == []
+        assert unsupported_targets("auto", ["macd"]) == []
+    
+    def test_stock_frame(self, monkeypatch):
+        def batch_request_stock(stock_code, begin_date, end_date, target, ret_stat=False):
+            stat = {x: {"elapsed": 0, "status": "ok" if x == "600001" else "timeout", "error": ""}
+                    for x in stock_code.split(",")}
+            return pd.DataFrame({"600001": [1.0]}), stat
+        
+        stub = types.SimpleNamespace(batch_request_stock=batch_request_stock)
+        monkeypatch.setitem(dashboard.DATA_SOURCES, "stub", stub)
+        params = {"stock_code": "600001,600002", "begin_date": "2021-04-01", "end_date": "2021-04-02",
+                  "target": "close"}
+        df, failed = stock_frame("stub", params)
+        # 未成功的股票不缓存图表
+        assert list(df.columns) == ["600001"] and failed == ["600002"]
+        # 过去的区间也每天重新生成一次，前复权价格每天校验
+        assert stock_version() == f"{datetime.date.today():%Y%m%d}"
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -5,20 +5,36 @@
 # @Author  : wuyazibest
 # @Email   : wuyazibest@163.com
 # @Desc   :
-from flask import Blueprint
+import os
 
+from flask import Blueprint, send_from_directory
+
+from main.config import BASE_DIR
 from .view import *
 
 blu_chart = Blueprint("chart", __name__)
 
+# 页面壳不含数据，浏览器长期缓存 秒
+SHELL_MAX_AGE = 60 * 60 * 24 * 365
+
 
 @blu_chart.route("/home", methods={"GET", "POST"})
 def home():
     return "this is draw chart home page!"
 
 
+@blu_chart.route("/shell", methods={"GET"})
+def shell():
+    """
+    请求图表接口的 format=option 后 setOption，如 /chart/shell?api=/chart/stock/query&stock_code=600001...
+    """
+    return send_from_directory(os.path.join(BASE_DIR, "dist"), "chart_shell.html", max_age=SHELL_MAX_AGE)
+
+
 blu_chart.add_url_rule("/tiobe/option", view_func=TiobeView.as_view({"GET": "query_option", "POST": "query_option"}))
 blu_chart.add_url_rule("/tiobe/query", view_func=TiobeView.as_view({"GET": "get_query", }))
 
 blu_chart.add_url_rule("/stock/option", view_func=StockView.as_view({"GET": "query_option", "POST": "query_option"}))
 blu_chart.add_url_rule("/stock/query", view_func=StockView.as_view({"GET": "get_query", }))
+
+blu_chart.add_url_rule("/dashboard/query", view_func=DashboardView.as_view({"GET": "get_query", }))
@@ -27,9 +27,13 @@ from main.core import (
     jwt_encode_handler,
     json_resp,
     )
-from main.draw_chart.data_source import tiobe, tencent_stock, ifeng_stock
-from main.util.common import generate_md5
+from main.draw_chart.data_source.indicator import INDICATORS
+from main.draw_chart.dashboard import DATA_SOURCES, TIOBE_CHART_TYPES, tiobe_key, tiobe_chart, stock_version, \
+    stock_frame, frame_chart, unsupported_targets
 from main.util.draw import draw_bar, draw_line, draw_timeline
+from main.util.artifact_cache import artifact_cache
+from main.util.draw.render import chart_response, FORMATS
+from main.util.draw.executor import render_executor
 
 logger = logging.getLogger(__name__)
 
@@ -46,10 +50,17 @@ class TiobeView(ModelViewSet):
             {
                 "field"  : "chart_type",
                 "mean"   : "图形类别",
-                "value"  : ["bar", "line", "timeline"],
+                "value"  : TIOBE_CHART_TYPES,
                 "is_must": False,
                 "type"   : "str",
-                }
+                },
+            {
+                "field"  : "format",
+                "mean"   : "返回格式-html页面 option为ECharts配置json svg为缩略图",
+                "value"  : list(FORMATS),
+                "is_must": False,
+                "type"   : "str",
+                },
             ]
         
         return json_resp(RET.OK, f"{self.resources}成功", data=data)
@@ -60,31 +71,14 @@ class TiobeView(ModelViewSet):
         params = {x: self.request_args.get(x) for x in self.query_field if self.request_args.get(x, "") != ""}
         
         chart_type = self.request_args.get("chart_type") or "line"
-        file_name = chart_type + "_tiobe_chart.html"
-        file_path = os.path.join(BASE_DIR, "dist", file_name)
-        if os.path.exists(file_path):
-            return render_template(file_name)
-        
-        title = {
-            "path"      : file_path,
-            "title"     : "开发语言热度",
-            "xaxis_name": "语言种类",
-            "yaxis_name": "热度",
-            }
-        
-        df = tiobe.get_format_data()
-        df = df.replace({np.nan: None})
-        
-        if chart_type == "bar":
-            draw_bar(df.index.values.tolist(), df.to_dict("list"), **title)
-        elif chart_type == "line":
-            draw_line(df.index.values.tolist(), df.to_dict("list"), **title)
-        elif chart_type == "timeline":
-            draw_timeline(df.to_dict("index"), **title)
-        else:
+        fmt = self.request_args.get("format") or "html"
+        if chart_type not in TIOBE_CHART_TYPES:
             raise ParamError("图形类别错误")
+        if fmt not in FORMATS:
+            raise ParamError("返回格式错误")
         
-        return render_template(file_name)
+        # 与定时预生成的图表相同的key
+        return chart_response(tiobe_key(chart_type, fmt), lambda: tiobe_chart(chart_type), fmt=fmt)
 
 
 class StockView(ModelViewSet):
@@ -94,7 +88,8 @@ class StockView(ModelViewSet):
         "stock_code",
         "begin_date",
         "end_date",
-        "target"
+        "target",
+        "cycle",
         )
     query_required_field = (
         "stock_code",
@@ -102,24 +97,25 @@ class StockView(ModelViewSet):
         "end_date",
         "target"
         )
-    data_source_map = {
-        "tencent": tencent_stock,
-        "ifeng"  : ifeng_stock,
-        }
+    data_source_map = DATA_SOURCES
     chart_type_map = {
         "bar"     : draw_bar,
         "line"    : draw_line,
         "timeline": draw_timeline,
         }
+    cycle_map = (
+        "day",
+        "week",
+        "month",
+        "quarter",
+        )
     target_map = (
         "open",
         "close",
         "high",
         "low",
-        "volume"
-        "ys_close",
-        "true_range",
-        "price_range",
+        "volume",
+        *INDICATORS,
         )
     
     @staticmethod
@@ -174,6 +170,27 @@ class StockView(ModelViewSet):
                     "is_must": True,
                     "type"   : "str",
                     },
+                {
+                    "field"  : "cycle",
+                    "mean"   : "周期-日线 周线 月线 季线",
+                    "value"  : self.cycle_map,
+                    "is_must": False,
+                    "type"   : "str",
+                    },
+                {
+                    "field"  : "format",
+                    "mean"   : "返回格式-html页面 option为ECharts配置json svg为缩略图",
+                    "value"  : list(FORMATS),
+                    "is_must": False,
+                    "type"   : "str",
+                    },
+                {
+                    "field"  : "max_points",
+                    "mean"   : "最多显示的点数-超过时降采样",
+                    "value"  : 1000,
+                    "is_must": False,
+                    "type"   : "int",
+                    },
                 ]
             
             return json_resp(RET.OK, f"{self.resources}查询成功", data=data)
@@ -198,29 +215,91 @@ class StockView(ModelViewSet):
             raise ParamError("参数错误")
         if target not in self.target_map:
             raise ParamError("参数错误")
+        if unsupported_targets(data_source, [target]):
+            raise ParamError(f"数据源{data_source}不支持指标{target}")
+        if params.get("cycle", "day") not in self.cycle_map:
+            raise ParamError("参数错误")
+        max_points = str(self.request_args.get("max_points") or 0)
+        if not max_points.isdecimal():
+            raise ParamError("参数错误")
+        max_points = int(max_points)
+        fmt = self.request_args.get("format") or "html"
+        if fmt not in FORMATS:
+            raise ParamError("参数错误")
+        max_points = max_points or FORMATS[fmt].get("max_points", 0)
         
-        file_name = generate_md5(f"{chart_type}{data_source}{str(params)}") + "_stock_chart.html"
-        file_path = os.path.join(BASE_DIR, "dist", file_name)
-        if os.path.exists(file_path):
-            return render_template(file_name)
-        
-        title = {
-            "path"      : file_path,
-            "title"     : "股票趋势",
-            "xaxis_name": "股票",
-            "yaxis_name": "数值",
-            }
-        
-        df = self.data_source_map[data_source].batch_request_stock(**params)
-        df = df.replace({np.nan: None})
-        
-        if chart_type == "bar":
-            draw_bar(df.index.values.tolist(), df.to_dict("list"), **title)
-        elif chart_type == "line":
-            draw_line(df.index.values.tolist(), df.to_dict("list"), **title)
-        elif chart_type == "timeline":
-            draw_timeline(df.to_dict("index"), **title)
-        else:
-            raise ParamError("图形类别错误")
+        key = artifact_cache.key("stock", {**params, "chart_type": chart_type, "data_source": data_source,
+                                           "max_points": max_points, "format": fmt, "version": stock_version()})
+        
+        failed = []
+        
+        def build():
+            df, ret = stock_frame(data_source, params)
+            failed.extend(ret)
+            return frame_chart(df, chart_type, max_points)
+        
+        # 有股票超时、出错或没有数据时不缓存，下次重新请求
+        return chart_response(key, build, fmt=fmt, persist=lambda: not failed)
+
+
+class DashboardView(StockView):
+    """
+    同一股票的多个指标在一个页面中，每个指标一个图表，在进程池中并行生成
+    """
+    resources = "dashboard"
+    query_field = (
+        "stock_code",
+        "begin_date",
+        "end_date",
+        "cycle",
+        )
+    query_required_field = (
+        "stock_code",
+        "begin_date",
+        "end_date",
+        "targets",
+        )
+    
+    def get_query(self):
+        logger.info(f"{self.resources}查询 user:{self.current_user.username} params:{self.request_args}")
+        params = {x: self.request_args.get(x) for x in self.query_field if self.request_args.get(x, "") != ""}
+        
+        if not all([self.request_args.get(x, "") != "" for x in self.query_required_field]):
+            raise ParamError("参数缺失")
+        
+        chart_type = self.request_args.get("chart_type") or "line"
+        data_source = self.request_args.get("data_source") or "tencent"
+        targets = [x for x in self.request_args.get("targets").split(",") if x]
+        
+        if chart_type not in self.chart_type_map:
+            raise ParamError("参数错误")
+        if data_source not in self.data_source_map:
+            raise ParamError("参数错误")
+        if not targets or not all([x in self.target_map for x in targets]):
+            raise ParamError("参数错误")
+        unsupported = unsupported_targets(data_source, targets)
+        if unsupported:
+            raise ParamError(f"数据源{data_source}不支持指标{','.join(unsupported)}")
+        if params.get("cycle", "day") not in self.cycle_map:
+            raise ParamError("参数错误")
+        max_points = str(self.request_args.get("max_points") or 0)
+        if not max_points.isdecimal():
+            raise ParamError("参数错误")
+        max_points = int(max_points)
+        
+        key = artifact_cache.key("dashboard", {**params, "targets": targets, "chart_type": chart_type,
+                                               "data_source": data_source, "max_points": max_points,
+                                               "version": stock_version()})
+        
+        failed = []
+        
+        def build():
+            # 在当前进程获取数据，进程池只生成图表
+            tasks = []
+            for x in targets:
+                df, ret = stock_frame(data_source, {**params, "target": x})
+                failed.extend(ret)
+                tasks.append((frame_chart, (df, chart_type, max_points, f"股票趋势-{x}"), {}))
+            return render_executor.page(tasks, page_title="股票指标")
         
-        return render_template(file_name)
+        return chart_response(key, build, persist=lambda: not failed)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : artifact_cache.py
+# @Time   : 2026/10/18 22:40
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 图表文件缓存，key 由参数生成，同时保存 gzip/brotli 压缩文件，总大小超出上限时按 LRU/LFU 淘汰
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from main.config import BASE_DIR, ARTIFACT_CACHE_BYTES, ARTIFACT_CACHE_POLICY
+from main.util.db import redis_store
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = "artifact:"
+# 淘汰后保留的比例，避免每次写入都触发淘汰
+EVICT_RATIO = 0.9
+
+
+class ArtifactCache:
+    # 优先使用压缩率高的
+    encodings = {
+        "br"  : ".br",
+        "gzip": ".gz",
+        }
+    
+    def __init__(self, path=None, budget=ARTIFACT_CACHE_BYTES, policy=ARTIFACT_CACHE_POLICY, suffix=".html"):
+        """
+        :param path: 缓存目录
+        :param budget: 所有文件总大小上限 字节，包含压缩文件
+        :param policy: lru 最久未访问的先淘汰 lfu 访问次数少的先淘汰
+        :param suffix: 原始文件后缀
+        """
+        self.path = path or os.path.join(BASE_DIR, "dist", "artifact")
+        self.budget = budget
+        self.policy = policy
+        self.suffix = suffix
+        # 按目录区分总大小计数，不同目录的实例互不覆盖
+        path_hash = hashlib.md5(os.path.abspath(self.path).encode("utf-8")).hexdigest()
+        self.bytes_key = f"{ARTIFACT_PREFIX}bytes:{path_hash}"
+    
+    @staticmethod
+    def key(namespace, params):
+        """
+        参数按key排序后生成，与参数顺序无关
+        :param namespace: 图表类别，作为文件名前缀
+        :param params: 影响图表内容的全部参数
+        """
+        text = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return f"{namespace}_{hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]}"
+    
+    @staticmethod
+    def etag(key):
+        return f'"{key}"'
+    
+    def file_path(self, key, encoding=None):
+        return os.path.join(self.path, key + self.suffix + self.encodings.get(encoding, ""))
+    
+    def exists(self, key):
+        return os.path.exists(self.file_path(key))
+    
+    def select(self, key, accept_encodings=()):
+        """
+        按客户端支持的压缩方式选择文件并记录访问
+        :param accept_encodings: 客户端支持的压缩方式
+        :return: (文件路径, 压缩方式)，不存在时为 (None, None)
+        """
+        for encoding in self.encodings:
+            path = self.file_path(key, encoding)
+            if encoding in accept_encodings and os.path.exists(path):
+                break
+        else:
+            encoding, path = None, self.file_path(key)
+            if not os.path.exists(path):
+                return None, None
+        
+        self.touch(key)
+        return path, encoding
+    
+    def touch(self, key):
+        name = ARTIFACT_PREFIX + key
+        redis_store.hset(name, "atime", time.time())
+        redis_store.hincrby(name, "hits", 1)
+    
+    @staticmethod
+    def write(path, data):
+        """
+        先写临时文件再重命名，读取方不会读到写了一半的文件
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def put(self, key, content):
+        """
+        写入原始文件和压缩文件，原始文件最后写入，存在即表示压缩文件已就绪
+        :param content: str 或 bytes
+        :return: 写入的总字节数
+        """
+        os.makedirs(self.path, exist_ok=True)
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        variants = {"gzip": gzip.compress(data, compresslevel=9)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(data)
+        variants[None] = data
+        
+        # 覆盖已有的文件时只累加差值
+        old_size = 0
+        for encoding in variants:
+            path = self.file_path(key, encoding)
+            if os.path.exists(path):
+                old_size += os.path.getsize(path)
+            self.write(path, variants[encoding])
+        
+        size = sum(len(x) for x in variants.values())
+        redis_store.hset(ARTIFACT_PREFIX + key, mapping={"size": size, "atime": time.time(), "hits": 0})
+        # 淘汰需要扫描目录，不在请求中执行，超出上限时由定时任务 clean_file 淘汰
+        redis_store.incrby(self.bytes_key, size - old_size)
+        return size
+    
+    def scan(self):
+        """
+        以磁盘上的文件为准统计每个key的大小，redis 中没有的记录使用文件的修改时间
+        :return: {key: {"size": , "atime": , "hits": }}
+        """
+        if not os.path.isdir(self.path):
+            return {}
+        
+        entries = {}
+        for name in os.listdir(self.path):
+            if name.endswith(".tmp"):
+                continue
+            # 同一目录中可能有不同后缀的缓存，key 中没有 .
+            key = name.split(".")[0]
+            stat = os.stat(os.path.join(self.path, name))
+            entry = entries.setdefault(key, {"size": 0, "atime": 0, "hits": 0})
+            entry["size"] += stat.st_size
+            if not name.endswith(tuple(self.encodings.values())):
+                entry["atime"] = stat.st_mtime
+        
+        for key, entry in entries.items():
+            meta = redis_store.hgetall(ARTIFACT_PREFIX + key) or {}
+            entry["atime"] = float(meta.get("atime") or entry["atime"])
+            entry["hits"] = int(meta.get("hits") or 0)
+        return entries
+    
+    def remove(self, key):
+        for name in os.listdir(self.path):
+            if name.startswith(key + ".") and not name.endswith(".tmp"):
+                os.remove(os.path.join(self.path, name))
+        redis_store.delete(ARTIFACT_PREFIX + key)
+    
+    def evict(self, budget=None):
+        """
+        总大小超出上限时淘汰到上限的 EVICT_RATIO
+        :return: 淘汰的key数量
+        """
+        budget = self.budget if budget is None else budget
+        entries = self.scan()
+        total = sum(x["size"] for x in entries.values())
+        
+        count = 0
+        if total > budget:
+            if self.policy == "lfu":
+                order = sorted(entries, key=lambda x: (entries[x]["hits"], entries[x]["atime"]))
+            else:
+                order = sorted(entries, key=lambda x: entries[x]["atime"])
+            for key in order:
+                if total <= budget * EVICT_RATIO:
+                    break
+                self.remove(key)
+                total -= entries[key]["size"]
+                count += 1
+            logger.info(f"淘汰图表缓存 {count}个 剩余 {total}字节")
+        
+        # 以磁盘为准校正计数
+        redis_store.set(self.bytes_key, total)
+        return count
+
+
+artifact_cache = ArtifactCache()
+# 与 artifact_cache 在同一目录，共用大小上限
+option_cache = ArtifactCache(suffix=".json")
+svg_cache = ArtifactCache(suffix=".svg")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : async_http.py
+# @Time   : 2026/10/18 16:20
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : parse_url 的异步版本，一个事件循环内并发大量上游请求
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from main.util.http_pool import http_pool
+
+logger = logging.getLogger(__name__)
+
+# 每个事件循环各自的会话，会话不能跨事件循环使用
+_loop_sessions = weakref.WeakKeyDictionary()
+# run_sync 等待协程的最长时间 秒，超时后取消协程
+RUN_SYNC_TIMEOUT = 60
+
+
+def _get_session(url):
+    import aiohttp
+    
+    loop = asyncio.get_event_loop()
+    sessions = _loop_sessions.setdefault(loop, {})
+    host = http_pool.get_host(url)
+    if host not in sessions or sessions[host].closed:
+        conf = http_pool.get_conf(url)
+        connector = aiohttp.TCPConnector(limit_per_host=conf.pool_size, force_close=not conf.keep_alive)
+        sessions[host] = aiohttp.ClientSession(connector=connector)
+    return sessions[host]
+
+
+async def close_sessions():
+    sessions = _loop_sessions.pop(asyncio.get_event_loop(), {})
+    for session in sessions.values():
+        await session.close()
+
+
+async def __async_parse_url(method, url, ret_json=True, timeout=None, **kwargs):
+    import aiohttp
+    
+    if method.upper() in ["GET"]:
+        kwargs.setdefault("allow_redirects", True)
+    if isinstance(timeout, (tuple, list)):
+        timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+    else:
+        timeout = aiohttp.ClientTimeout(total=timeout)
+    
+    tt = time.time()
+    async with _get_session(url).request(method, url, timeout=timeout, **kwargs) as resp:
+        text = await resp.text()
+        logger.debug(f">>>> time:{(time.time() - tt):.3f} url: {method} {resp.url}")
+        if resp.status != 200:
+            raise Exception(text)
+        return json.loads(text) if ret_json else text
+
+
+async def async_parse_url(url, method="GET", ret_json=True, raise_exception=False, timeout=None, max_retry=None, **kwargs):
+    """
+    参数及返回值同 parse_url，超时、重试和退避使用 http_pool 中对应域名的配置
+    """
+    conf = http_pool.get_conf(url)
+    max_retry = max_retry or conf.max_retry
+    timeout = timeout or http_pool.timeout(url)
+    error = None
+    for attempt in range(1, max_retry + 1):
+        try:
+            return await __async_parse_url(method, url, ret_json=ret_json, timeout=timeout, **kwargs)
+        except Exception as e:
+            error = e
+            if attempt < max_retry:
+                # 指数退避加随机抖动
+                await asyncio.sleep(min(conf.backoff * 2 ** attempt, conf.backoff_max) + random.uniform(0, conf.jitter))
+    
+    msg = f"请求失败 {method} {url} kwargs:{json.dumps(kwargs, ensure_ascii=False, default=str)} error:{error}"
+    logger.error(msg)
+    if raise_exception:
+        raise Exception(msg)
+    return {} if ret_json else ""
+
+
+class _LoopThread:
+    """
+    每个进程一个常驻事件循环，会话和连接在多次请求间复用
+    进程 fork 后线程不存在，按进程号重新创建
+    """
+    
+    def __init__(self):
+        self.pid = None
+        self.loop = None
+        self._lock = threading.Lock()
+    
+    def get_loop(self):
+        with self._lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name="async-http", daemon=True).start()
+            return self.loop
+    
+    def close(self):
+        if self.loop is not None and self.pid == os.getpid() and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(close_sessions(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_loop_thread = _LoopThread()
+atexit.register(_loop_thread.close)
+
+
+def gevent_patched():
+    """
+    gevent 补丁后线程为协程，常驻事件循环与请求在同一个系统线程中，不能使用 run_sync
+    gunicorn gevent worker、celery -P gevent 中为 True
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def run_sync(coro, timeout=RUN_SYNC_TIMEOUT):
+    """
+    在同步代码(flask视图、celery任务)中执行协程，协程在常驻事件循环中执行，会话不关闭
+    gevent 补丁后不可用，调用前用 gevent_patched 判断
+    :param timeout: 最长等待时间 秒，超时后取消协程并抛出 TimeoutError
+    """
+    if gevent_patched():
+        coro.close()
+        raise RuntimeError("gevent 补丁后不能使用 run_sync")
+    
+    loop = _loop_thread.get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # 在常驻事件循环中等待自身会死锁，应直接 await
+        coro.close()
+        raise RuntimeError("不能在常驻事件循环中调用 run_sync")
+    
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
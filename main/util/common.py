@@ -19,6 +19,7 @@ from openpyxl import Workbook
 from retrying import retry
 
 from main import config
+from main.util.http_pool import http_pool
 
 logger = logging.getLogger(__name__)
 
@@ -67,15 +68,20 @@ def __parse_url(method, url, **kwargs):
     if method.upper() in ["GET"]:
         kwargs.setdefault('allow_redirects', True)
     tt = time.time()
-    resp = requests.request(method, url, **kwargs)
+    # 按域名复用长连接
+    resp = http_pool.session(url).request(method, url, **kwargs)
     logger.debug(f">>>> time:{(time.time() - tt):.3f} url: {method} {resp.url}")
-    if resp.status_code != 200:
+    # 304 只在发送条件请求时返回
+    if resp.status_code not in [200, 304]:
         raise Exception(resp.text)
     return resp
 
 
-def parse_url(url, method="GET", ret_json=True, raise_exception=False, timeout=10, max_retry=2, **kwargs):
+def parse_url(url, method="GET", ret_json=True, raise_exception=False, timeout=None, max_retry=None, ret_resp=False,
+              **kwargs):
     """
+    timeout 和 max_retry 不传时使用 http_pool 中对应域名的配置，重试时指数退避
+    ret_resp 为 True 时返回 Response 对象，用于读取响应头和状态码
     kwargs:
     headers  请求头
     params   请求参数
@@ -85,7 +91,10 @@ def parse_url(url, method="GET", ret_json=True, raise_exception=False, timeout=1
     """
     try:
         # resp = _parse_url(method, url, timeout=timeout, **kwargs)
-        resp = retry(stop_max_attempt_number=max_retry)(__parse_url)(method, url, timeout=timeout, **kwargs)
+        resp = retry(**http_pool.retry_kwargs(url, max_retry))(__parse_url)(
+            method, url, timeout=timeout or http_pool.timeout(url), **kwargs)
+        if ret_resp:
+            return resp
         return resp.json() if ret_json else resp.text
     except Exception as e:
         msg = f"请求失败 {method} {url} kwargs:{json.dumps(kwargs, ensure_ascii=False)} error:{e}"
@@ -93,7 +102,7 @@ def parse_url(url, method="GET", ret_json=True, raise_exception=False, timeout=1
         if raise_exception:
             raise Exception(msg)
         else:
-            return {} if ret_json else ""
+            return None if ret_resp else {} if ret_json else ""
 
 
 def get_request_ip(request):
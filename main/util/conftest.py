@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : conftest.py
+# @Time   : 2026/10/19 15:10
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 测试不连接真实的 redis
+import pytest
+
+from main.util import artifact_cache, single_flight
+
+
+class FakeRedis:
+    """
+    只实现图表缓存用到的命令，lock 返回 None 与 redis 不可用时相同
+    """
+    
+    def __init__(self):
+        self.data = {}
+    
+    def hset(self, name, key=None, value=None, mapping=None):
+        entry = self.data.setdefault(name, {})
+        if key is not None:
+            entry[key] = str(value)
+        entry.update({k: str(v) for k, v in (mapping or {}).items()})
+    
+    def hincrby(self, name, key, amount=1):
+        entry = self.data.setdefault(name, {})
+        entry[key] = str(int(entry.get(key, 0)) + amount)
+        return int(entry[key])
+    
+    def hgetall(self, name):
+        return dict(self.data.get(name, {}))
+    
+    def incrby(self, name, amount=1):
+        self.data[name] = str(int(self.data.get(name, 0)) + amount)
+        return int(self.data[name])
+    
+    def set(self, name, value):
+        self.data[name] = str(value)
+    
+    def get(self, name):
+        return self.data.get(name)
+    
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+    
+    def lock(self, name, **kwargs):
+        return None
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    store = FakeRedis()
+    monkeypatch.setattr(artifact_cache, "redis_store", store)
+    monkeypatch.setattr(single_flight, "redis_store", store)
+    return store
@@ -8,7 +8,8 @@
 from .bar import draw_bar, draw_single_bar
 from .line import draw_line
 from .timeline import draw_timeline
+from .frame import draw_frame, frame_series
 
 __all__ = [
-    "draw_bar", "draw_single_bar", "draw_line", "draw_timeline"
+    "draw_bar", "draw_single_bar", "draw_line", "draw_timeline", "draw_frame", "frame_series"
     ]
@@ -8,7 +8,8 @@
 from pyecharts.charts import Bar
 from pyecharts import options as opts
 
-from .base import base_colors, color_function, chart_lib, fmt_file_path
+from .downsample import downsample
+from .base import base_colors, color_function, chart_lib, fmt_file_path, add_dataset
 
 
 def draw_bar(xaxis,
@@ -19,6 +20,8 @@ def draw_bar(xaxis,
              xaxis_name=None,
              yaxis_name=None,
              stack=None,
+             max_points=None,
+             dataset=False,
              ) -> Bar:
     """
     :param xaxis:
@@ -37,22 +40,30 @@ def draw_bar(xaxis,
     'Visual Basic': [None, None, None, None, None, None, None, None, None, None]
     }
     :param colors:
-    :param path:
+    :param path: 为空时不写文件，由调用方 render_embed
     :param title:
     :param xaxis_name:
     :param yaxis_name:
     :param stack:
+    :param max_points: x轴最多保留的点数，超过时每个区间保留最小值和最大值
+    :param dataset: 是否使用 dataset 输出数据，x轴只输出一次，不再每组柱子重复
     :return:
     """
+    xaxis, row_dict = downsample(xaxis, row_dict, max_points, method="minmax")
     colors = colors or base_colors
     graph = chart_lib("bar")
-    graph.add_xaxis(xaxis)
+    if dataset:
+        encodes = add_dataset(graph, xaxis, row_dict)
+    else:
+        graph.add_xaxis(xaxis)
+        encodes = [None] * len(row_dict)
     
     for index, (k, row) in enumerate(row_dict.items()):
         graph.add_yaxis(
             k, row,
             color=colors[index] if len(colors) > index else None,
             stack=stack,
+            encode=encodes[index],
             # itemstyle_opts=opts.ItemStyleOpts(color=JsCode(color_function)),  # 使用js来控制颜色
             )
     
@@ -60,10 +71,27 @@ def draw_bar(xaxis,
                           tooltip_opts=opts.TooltipOpts(is_show=True, trigger="axis", axis_pointer_type="shadow"),
                           xaxis_opts=opts.AxisOpts(name=xaxis_name, axislabel_opts={"interval": "0"}),
                           yaxis_opts=opts.AxisOpts(name=yaxis_name))
-    graph.render(fmt_file_path(path))
+    if path:
+        graph.render(fmt_file_path(path))
     return graph
 
 
+def bar_colors(keys, colors=None):
+    """
+    :return: {列名: 颜色}，颜色不够时为 None
+    """
+    colors = colors or base_colors
+    return {k: colors[index] if len(colors) > index else None for index, k in enumerate(keys)}
+
+
+def sort_bar_data(data_dict, max_columns=None):
+    """
+    按数值升序，只保留最大的 max_columns 个，None 和 nan 按 0 排序
+    """
+    max_columns = max_columns or len(data_dict)
+    return dict(sorted(data_dict.items(), key=lambda x: 0 if x[1] is None or x[1] != x[1] else x[1])[-max_columns:])
+
+
 def draw_single_bar(
         data_dict,
         colors=None,
@@ -98,12 +126,10 @@ def draw_single_bar(
     :param max_columns: 最大显示柱子数
     :return:
     """
-    colors = colors or base_colors
     # 数据重新排序后颜色如果不使用字典，一种颜色对应的数据列会改变
-    data_colors = {k: colors[index] if len(colors) > index else None for index, k in enumerate(data_dict)}
+    data_colors = bar_colors(data_dict, colors)
     graph = chart_lib("bar")
-    max_columns = max_columns or len(data_dict)
-    data_dict = dict(sorted(data_dict.items(), key=lambda x: x[1] or 0)[-max_columns:])
+    data_dict = sort_bar_data(data_dict, max_columns)
     
     graph.add_xaxis(list(data_dict.keys()))
     
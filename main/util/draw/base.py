@@ -9,9 +9,13 @@ import os
 
 from pyecharts.charts import Bar, Timeline, Line
 from pyecharts import options
+from pyecharts.globals import CurrentConfig
 
 from main.config import BASE_DIR
 
+# 配置不缩进，一次遍历输出，调试时可改为 True
+CurrentConfig.PRETTY_OPTIONS = False
+
 color_function = """
         function (params) {
             if (params.value < 1)
@@ -60,7 +64,24 @@ def chart_lib(chart_type):
         return Timeline(initopts)
 
 
-def fmt_file_path(path):
+def add_dataset(graph, xaxis, row_dict):
+    """
+    x轴和各列数据写入同一个 dataset，每行为 [x, 列1, 列2, ...]，x轴只输出一次
+    :return: 各列的 encode，第 0 维为x轴
+    """
+    graph.add_xaxis(None)
+    graph.add_dataset(
+        source=[list(row) for row in zip(xaxis, *row_dict.values())],
+        dimensions=["x", *row_dict.keys()],
+        )
+    # 按维度下标绑定，列名与 x 重复时也不会错位
+    return [{"x": 0, "y": index + 1} for index in range(len(row_dict))]
+
+
+def fmt_file_path(path, remove=True):
+    """
+    :param remove: 是否删除已存在的文件，原子替换时不删除
+    """
     if os.path.splitext(path)[1] != ".html":
         path += ".html"
     
@@ -68,7 +89,8 @@ def fmt_file_path(path):
         path = os.path.join(BASE_DIR, "dist", path.lstrip("/"))
     
     if os.path.exists(path):
-        os.remove(path)
+        if remove:
+            os.remove(path)
     else:
         dirpath = os.path.dirname(path)
         if not os.path.exists(dirpath):
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : downsample.py
+# @Time   : 2026/10/18 20:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 图表数据降采样，控制嵌入页面的点数
+import numpy as np
+
+
+def to_array(row):
+    """
+    None 转为 nan
+    """
+    if isinstance(row, np.ndarray):
+        return row.astype("float64")
+    return np.array([np.nan if x is None else x for x in row], dtype="float64")
+
+
+def lttb(y, n):
+    """
+    Largest-Triangle-Three-Buckets 折线降采样，保留首尾点，每个桶保留与相邻点组成三角形面积最大的点
+    :param y: 不含 nan 的数据
+    :param n: 保留的点数
+    :return: 保留的点的下标
+    """
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    
+    x = np.arange(size, dtype="float64")
+    every = (size - 2) / (n - 2)
+    # 第 i 个桶为 [edges[i], edges[i + 1])，最后一个边界为最后一个点
+    edges = np.floor(np.arange(n - 1) * every).astype(int) + 1
+    ret = np.empty(n, dtype=int)
+    ret[0], ret[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < n - 1 else size
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        ret[i + 1] = a
+    return ret
+
+
+def minmax(y, n):
+    """
+    柱状图降采样，每个桶保留最小值和最大值，保留首尾点
+    :param y: 不含 nan 的数据
+    :param n: 保留的点数
+    :return: 保留的点的下标
+    """
+    size = len(y)
+    if n >= size or n < 4:
+        return np.arange(size)
+    
+    ret = [0, size - 1]
+    for bucket in np.array_split(np.arange(1, size - 1), (n - 2) // 2):
+        if len(bucket):
+            ret.extend([bucket[np.argmin(y[bucket])], bucket[np.argmax(y[bucket])]])
+    return np.unique(ret)
+
+
+METHODS = {
+    "lttb"  : lttb,
+    "minmax": minmax,
+    }
+
+
+def downsample(xaxis, row_dict, max_points, method="lttb"):
+    """
+    每列分别降采样，x轴取各列保留下标的并集，每列的点数预算为 max_points / 列数
+    列数多时并集可能超过 max_points，再按等间隔截取到 max_points
+    :param xaxis: x轴
+    :param row_dict: {列名: 数据}
+    :param max_points: x轴最多保留的点数
+    :param method: lttb 折线 minmax 柱状图
+    :return: xaxis, row_dict
+    """
+    size = len(xaxis)
+    if not max_points or size <= max_points or not row_dict:
+        return xaxis, row_dict
+    
+    fn = METHODS[method]
+    budget = max(max_points // len(row_dict), 3)
+    keep = [np.array([0, size - 1])]
+    for row in row_dict.values():
+        y = to_array(row)
+        valid = np.flatnonzero(~np.isnan(y))
+        if len(valid):
+            # 只对有数据的点降采样，下标映射回原数据
+            keep.append(valid[fn(y[valid], budget)])
+    keep = np.unique(np.concatenate(keep))
+    if len(keep) > max_points:
+        # 保留首尾点
+        keep = keep[np.unique(np.linspace(0, len(keep) - 1, max(max_points, 2)).round().astype(int))]
+    
+    xaxis = [xaxis[i] for i in keep]
+    row_dict = {k: [row[i] for i in keep] for k, row in row_dict.items()}
+    return xaxis, row_dict
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : executor.py
+# @Time   : 2026/10/18 23:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 多进程生成图表，数据在主进程中获取，子进程只生成并序列化配置，主进程组装 Page/Tab
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pyecharts.charts import Page, Tab
+from pyecharts.render import engine
+
+from main.config import RENDER_POOL_WORKERS
+from main.util.async_http import gevent_patched
+
+logger = logging.getLogger(__name__)
+
+
+class PrerenderedChart:
+    """
+    子进程中生成的图表，配置已序列化，只保留渲染页面需要的属性，传回主进程时很小
+    """
+    
+    def __init__(self, graph):
+        self.__dict__.update({k: v for k, v in vars(graph).items() if k != "options"})
+        self.json_contents = graph.dump_options()
+    
+    def dump_options(self):
+        # Page/Tab 渲染时调用，不再序列化
+        return self.json_contents
+    
+    def render_embed(self, template_name="simple_chart.html", env=None, **kwargs):
+        return engine.render_embed(self, template_name, env, **kwargs)
+
+
+def _build(fn, args, kwargs):
+    return PrerenderedChart(fn(*args, **kwargs))
+
+
+def pool_unsupported():
+    """
+    当前进程不能使用进程池的原因，可以使用时为空
+    """
+    # celery prefork 的 worker 是守护进程，不能创建子进程
+    if multiprocessing.current_process().daemon:
+        return "守护进程"
+    # gunicorn gevent worker / celery -P gevent 打过补丁后等待子进程结果会阻塞协程
+    if gevent_patched():
+        return "gevent"
+    # uwsgi 中 sys.executable 为 uwsgi 程序，spawn 无法启动，需要配置 py-sys-executable
+    if "uwsgi" in os.path.basename(sys.executable):
+        return "uwsgi 未配置 py-sys-executable"
+    return ""
+
+
+class RenderExecutor:
+    
+    def __init__(self, max_workers=RENDER_POOL_WORKERS):
+        """
+        :param max_workers: 进程数，不超过cpu数量，为0时不使用进程池，在当前进程生成
+        """
+        self.max_workers = min(max_workers, os.cpu_count() or 1)
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._warned = False
+        atexit.register(self.shutdown)
+    
+    @property
+    def pool(self):
+        with self._lock:
+            # fork 出的子进程不能使用父进程的进程池
+            if self._pool is None or self._pid != os.getpid():
+                # 主进程有线程池和 redis 连接，子进程使用 spawn 启动
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+                self._pid = os.getpid()
+            return self._pool
+    
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown()
+            self._pool = None
+    
+    def inline(self, tasks):
+        if len(tasks) <= 1 or self.max_workers <= 0:
+            return True
+        
+        reason = pool_unsupported()
+        if reason and not self._warned:
+            logger.warning(f"图表进程池不可用，在当前进程生成 {reason}")
+            self._warned = True
+        return bool(reason)
+    
+    def map(self, tasks):
+        """
+        :param tasks: [(fn, args, kwargs)]，fn 为模块级函数，返回 pyecharts 图表，参数可 pickle
+            参数中传入已获取的数据，子进程中不再请求数据源
+        :return: 与 tasks 顺序相同的 PrerenderedChart
+        """
+        tasks = [(fn, tuple(args), dict(kwargs)) for fn, args, kwargs in tasks]
+        if self.inline(tasks):
+            return [_build(*x) for x in tasks]
+        
+        try:
+            futures = [self.pool.submit(_build, *x) for x in tasks]
+            return [x.result() for x in futures]
+        except BrokenProcessPool as e:
+            logger.error(f"图表进程池异常，在当前进程生成 error:{e}")
+            self.shutdown()
+            return [_build(*x) for x in tasks]
+    
+    def page(self, tasks, page_title="DrawChart", layout=Page.SimplePageLayout):
+        page = Page(page_title=page_title, layout=layout)
+        page.add(*self.map(tasks))
+        return page
+    
+    def tab(self, tasks, tab_names, page_title="DrawChart"):
+        tab = Tab(page_title=page_title)
+        for chart, name in zip(self.map(tasks), tab_names):
+            tab.add(chart, name)
+        return tab
+
+
+render_executor = RenderExecutor()
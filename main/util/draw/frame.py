@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : frame.py
+# @Time   : 2026/10/18 21:00
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 直接使用 DataFrame / ndarray 画图，nan 在序列化时输出为 null
+import numpy as np
+import pandas as pd
+
+from .bar import draw_bar
+from .line import draw_line
+from .timeline import draw_timeline
+
+
+def frame_values(data, xaxis=None, columns=None):
+    """
+    :param data: DataFrame 或二维 ndarray(行为x轴，列为数据列)
+    :param xaxis: data 为 ndarray 时的x轴，默认为行号
+    :param columns: data 为 ndarray 时的列名，默认为列号
+    :return: xaxis, columns, float64 二维数组
+    """
+    if isinstance(data, pd.DataFrame):
+        xaxis = data.index.astype(str).tolist()
+        columns = [str(x) for x in data.columns]
+        values = data.to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        values = np.asarray(data, dtype="float64")
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        xaxis = [str(x) for x in (xaxis if xaxis is not None else range(values.shape[0]))]
+        columns = [str(x) for x in (columns if columns is not None else range(values.shape[1]))]
+    return xaxis, columns, values
+
+
+def frame_series(data, xaxis=None, columns=None):
+    """
+    按列读取为 float 数组后一次转为列表，不生成 object 类型的 DataFrame
+    :return: xaxis, row_dict
+    """
+    xaxis, columns, values = frame_values(data, xaxis, columns)
+    # 列优先复制一次，每列连续
+    values = np.asfortranarray(values)
+    return xaxis, {k: values[:, i].tolist() for i, k in enumerate(columns)}
+
+
+def draw_frame(data, chart_type="line", xaxis=None, columns=None, **kwargs):
+    """
+    :param data: DataFrame 或二维 ndarray，索引为x轴，列为数据列
+    :param chart_type: bar line timeline
+    :param kwargs: 传给 draw_bar / draw_line / draw_timeline
+    """
+    if chart_type == "bar":
+        return draw_bar(*frame_series(data, xaxis, columns), **kwargs)
+    elif chart_type == "line":
+        return draw_line(*frame_series(data, xaxis, columns), **kwargs)
+    elif chart_type == "timeline":
+        kwargs.pop("max_points", None)
+        kwargs.pop("dataset", None)
+        xaxis, columns, values = frame_values(data, xaxis, columns)
+        # 每个时间点一行
+        return draw_timeline({x: dict(zip(columns, row)) for x, row in zip(xaxis, values.tolist())}, **kwargs)
+    raise ValueError(f"不支持的图形类别 {chart_type}")
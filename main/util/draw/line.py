@@ -9,7 +9,8 @@
 from pyecharts.charts import Line
 from pyecharts import options as opts
 
-from .base import base_colors, chart_lib, fmt_file_path
+from .downsample import downsample
+from .base import base_colors, chart_lib, fmt_file_path, add_dataset
 
 
 def draw_line(
@@ -21,6 +22,8 @@ def draw_line(
         xaxis_name=None,
         yaxis_name=None,
         stack=None,
+        max_points=None,
+        dataset=False,
         ) -> Line:
     """
     :param xaxis:
@@ -39,22 +42,30 @@ def draw_line(
     'Visual Basic': [None, None, None, None, None, None, None, None, None, None]
     }
     :param colors:
-    :param path:
+    :param path: 为空时不写文件，由调用方 render_embed
     :param title:
     :param xaxis_name:
     :param yaxis_name:
     :param stack:
+    :param max_points: x轴最多保留的点数，超过时按 LTTB 降采样
+    :param dataset: 是否使用 dataset 输出数据，x轴只输出一次，不再每条线重复
     :return:
     """
+    xaxis, row_dict = downsample(xaxis, row_dict, max_points, method="lttb")
     colors_raw = colors or base_colors
     color = colors_raw.copy()
     color.reverse()
     graph = chart_lib("line")
-    graph.add_xaxis(xaxis)
+    if dataset:
+        encodes = add_dataset(graph, xaxis, row_dict)
+    else:
+        graph.add_xaxis(xaxis)
+        encodes = [None] * len(row_dict)
     
-    for k, row in row_dict.items():
+    for (k, row), encode in zip(row_dict.items(), encodes):
         graph.add_yaxis(
             k, row,
+            encode=encode,
             color=color.pop() if color else None,
             is_symbol_show=False,  # 线上的小圆点
             is_connect_nones=False,  # 连接空数据
@@ -82,5 +93,6 @@ def draw_line(
                                  max_="dataMax"),
         yaxis_opts=opts.AxisOpts(name=yaxis_name),
         )
-    graph.render(fmt_file_path(path))
+    if path:
+        graph.render(fmt_file_path(path))
     return graph
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : render.py
+# @Time   : 2026/10/18 22:10
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 图表在内存中渲染后直接返回，同时写入缓存，支持 ETag 和预压缩文件
+import logging
+
+from flask import request, Response, send_file
+
+from main.util.artifact_cache import artifact_cache, option_cache, svg_cache
+from main.util.draw.svg import chart_svg, SVG_WIDTH
+from main.util.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
+
+# 返回格式，option 为 ECharts 配置，由缓存的页面壳 chart_shell.html 请求后 setOption
+# svg 为服务端生成的静态缩略图，max_points 为未指定时的降采样点数
+FORMATS = {
+    "html"  : {
+        "mimetype": "text/html",
+        "cache"   : artifact_cache,
+        "render"  : lambda graph: graph.render_embed(),
+        },
+    "option": {
+        "mimetype": "application/json",
+        "cache"   : option_cache,
+        # JsCode 输出为字符串，保证是合法的 json
+        "render"  : lambda graph: graph.dump_options_with_quotes(),
+        },
+    "svg"   : {
+        "mimetype"  : "image/svg+xml",
+        "cache"     : svg_cache,
+        "render"    : chart_svg,
+        "max_points": SVG_WIDTH,
+        },
+    }
+
+
+def persist_html(html, key, cache=artifact_cache):
+    """
+    写入缓存，同时生成压缩文件，写入失败不影响返回
+    :return: 写入的字节数，失败时为 0
+    """
+    try:
+        return cache.put(key, html)
+    except Exception as e:
+        logger.error(f"图表写入失败 {key} error:{e}")
+        return 0
+
+
+def render_chart(key, draw_fn, cache=None, persist=True, fmt="html"):
+    """
+    图表已缓存时返回 None，由调用方直接发送文件
+    未缓存时调用 draw_fn() 得到图表并在内存中渲染，返回内容，persist 时写入缓存
+    在单飞锁内同步写入，等锁的进程拿到锁后能看到缓存，不会再生成一次
+    :param key: 缓存key，同时作为单飞锁的key
+    :param draw_fn: 返回 pyecharts 图表，不写文件
+    :param cache: 默认为 fmt 对应的缓存
+    :param persist: 是否写入缓存，为函数时在 draw_fn() 之后调用，数据不完整时可以不缓存
+    :param fmt: html 完整页面 option 只有 ECharts 配置的 json
+    :return: 内容或 None
+    """
+    cache = cache or FORMATS[fmt]["cache"]
+    ret = {}
+    
+    def build():
+        ret["content"] = FORMATS[fmt]["render"](draw_fn())
+        if persist() if callable(persist) else persist:
+            persist_html(ret["content"], key, cache)
+    
+    # 同一图表只由一个进程生成
+    single_flight(key, lambda: cache.exists(key), build)
+    return ret.get("content")
+
+
+def open_artifact(cache, key, accept_encodings=()):
+    """
+    选择文件后可能被淘汰，先打开文件，打开后被删除也可以继续发送
+    :return: (文件对象, 压缩方式)，不存在时为 (None, None)
+    """
+    path, encoding = cache.select(key, accept_encodings)
+    if path is None:
+        return None, None
+    try:
+        return open(path, "rb"), encoding
+    except FileNotFoundError:
+        return None, None
+
+
+def chart_response(key, draw_fn, cache=None, fmt="html", persist=True):
+    """
+    ETag 为缓存key，客户端已有相同图表时直接返回 304，不读文件
+    已缓存时按 Accept-Encoding 发送压缩文件
+    :param persist: 见 render_chart，为函数且返回 False 时不写入缓存，也不返回 ETag
+    """
+    cache = cache or FORMATS[fmt]["cache"]
+    mimetype = FORMATS[fmt]["mimetype"]
+    if request.if_none_match.contains(key):
+        resp = Response(status=304)
+    else:
+        content = render_chart(key, draw_fn, cache, persist=persist, fmt=fmt)
+        file, encoding = open_artifact(cache, key, request.accept_encodings) if content is None else (None, None)
+        if content is None and file is None:
+            # 发送前已被淘汰
+            content = FORMATS[fmt]["render"](draw_fn())
+        
+        if content is not None:
+            resp = Response(content, mimetype=mimetype)
+        else:
+            resp = send_file(file, mimetype=mimetype, conditional=False, etag=False)
+            if encoding:
+                resp.headers["Content-Encoding"] = encoding
+    
+    if callable(persist) and resp.status_code == 200 and not persist():
+        # 数据不完整，客户端也不缓存，不设置 ETag
+        resp.headers["Cache-Control"] = "no-store"
+    else:
+        resp.set_etag(key)
+        # 每次都向服务端确认，内容不变时为 304
+        resp.headers["Cache-Control"] = "no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
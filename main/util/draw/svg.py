@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : svg.py
+# @Time   : 2026/10/19 00:10
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 由 draw_line / draw_bar 生成的 ECharts 配置直接输出 SVG 缩略图，不需要浏览器
+import json
+import math
+import unicodedata
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from .downsample import downsample, to_array
+
+SVG_WIDTH = 480
+SVG_HEIGHT = 300
+SVG_CHART_TYPES = ("bar", "line")
+# 坐标保留的小数位，控制文件大小
+PRECISION = 1
+FONT_FAMILY = "sans-serif"
+AXIS_COLOR = "#6E7079"
+SPLIT_COLOR = "#E0E6F1"
+
+
+def text_width(text, font_size):
+    """
+    估算文字宽度，中文等宽字符按一个字号，其他按半个字号
+    """
+    text = str(text)
+    if text.isascii():
+        return len(text) * font_size * 0.55
+    return sum(font_size if unicodedata.east_asian_width(x) in "WF" else font_size * 0.55 for x in text)
+
+
+def fmt_number(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.6g}"
+
+
+def nice_ticks(lo, hi, count=5):
+    """
+    取 1 2 5 乘以 10 的整数次幂为间隔，刻度包含 lo 和 hi
+    :return: 刻度列表
+    """
+    if lo == hi:
+        lo, hi = (lo - 1, hi + 1) if lo == 0 else (min(lo, 0), max(hi, 0))
+    raw = (hi - lo) / count
+    base = 10 ** math.floor(math.log10(raw))
+    step = next(x * base for x in (1, 2, 5, 10) if x * base >= raw)
+    start = math.floor(lo / step) * step
+    end = math.ceil(hi / step) * step
+    # 消除浮点误差
+    digits = max(0, -int(math.floor(math.log10(step)))) + 1
+    return [round(start + i * step, digits) for i in range(int(round((end - start) / step)) + 1)]
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else {}
+    return value or {}
+
+
+def _item_value(item, index):
+    """
+    :param index: 折线数据为 [x, y] 时取值的下标
+    """
+    if isinstance(item, dict):
+        item = item.get("value")
+    if isinstance(item, list):
+        item = item[index] if len(item) > index else None
+    if isinstance(item, (int, float)) and not isinstance(item, bool) and item == item:
+        return float(item)
+    return None
+
+
+def _item_color(item):
+    if isinstance(item, dict):
+        return (item.get("itemStyle") or {}).get("color")
+
+
+def merge_timeline(options):
+    """
+    时间轴图表取最后一个时间点，与 baseOption 合并为普通图表的配置，标题后加上时间点
+    """
+    if "baseOption" not in options:
+        return options
+    base, frames = options["baseOption"], options.get("options") or [{}]
+    merged = dict(base)
+    for key, value in frames[-1].items():
+        if isinstance(value, list) and isinstance(base.get(key), list):
+            merged[key] = [{**b, **f} for b, f in zip(base[key], value)]
+        else:
+            merged[key] = value
+    periods = _first(base.get("timeline")).get("data") or []
+    title = _first(base.get("title"))
+    if periods and title.get("text"):
+        merged["title"] = [{**title, "text": f"{title['text']} {periods[len(frames) - 1]}"}]
+    return merged
+
+
+def chart_series(options):
+    """
+    读取类目轴和各系列数据，支持 dataset + encode 和 series.data 两种方式
+    :return: 类目轴 "x"/"y", 类目, [{"name", "type", "values", "stack", "color", "item_colors"}]
+    """
+    x_axis, y_axis = _first(options.get("xAxis")), _first(options.get("yAxis"))
+    # 柱状图翻转后类目在y轴
+    category_axis = "y" if y_axis.get("data") is not None or y_axis.get("type") == "category" else "x"
+    categories = (y_axis if category_axis == "y" else x_axis).get("data")
+    dataset = options.get("dataset")
+    if isinstance(dataset, list):
+        dataset = dataset[0] if dataset else None
+    source = (dataset or {}).get("source") or []
+    value_index = 0 if category_axis == "y" else 1
+    palette = options.get("color") or ["#5470c6"]
+    
+    series = []
+    for index, item in enumerate(options.get("series") or []):
+        if item.get("type") not in SVG_CHART_TYPES:
+            continue
+        encode = item.get("encode")
+        if item.get("data") is None and encode and source:
+            dim_x, dim_y = encode.get(category_axis, 0), encode.get("y" if category_axis == "x" else "x", 1)
+            if categories is None:
+                categories = [str(row[dim_x]) for row in source]
+            values = to_array([row[dim_y] if len(row) > dim_y else None for row in source])
+            item_colors = None
+        else:
+            data = item.get("data") or []
+            if categories is None:
+                categories = [str(x[0]) if isinstance(x, list) else str(i) for i, x in enumerate(data)]
+            values = to_array([_item_value(x, value_index) for x in data])
+            item_colors = [_item_color(x) for x in data]
+            if not any(item_colors):
+                item_colors = None
+        style = (item.get("lineStyle") if item["type"] == "line" else None) or {}
+        # 与 ECharts 相同，未单独设置颜色时按系列下标取调色盘
+        color = (item.get("itemStyle") or {}).get("color") or style.get("color") or palette[index % len(palette)]
+        series.append({
+            "name"       : item.get("name") or "",
+            "type"       : item["type"],
+            "values"     : values,
+            "stack"      : item.get("stack"),
+            "color"      : color,
+            "item_colors": item_colors,
+            })
+    
+    categories = categories or []
+    for item in series:
+        values = np.full(len(categories), np.nan)
+        size = min(len(categories), len(item["values"]))
+        values[:size] = item["values"][:size]
+        item["values"] = values
+    return category_axis, categories, series
+
+
+def reduce_points(categories, series, max_points):
+    """
+    类目数超过像素宽度时降采样，折线 LTTB 柱状图保留最值，单独设置颜色的数据点不降采样
+    """
+    if len(categories) <= max_points or any(x["item_colors"] for x in series):
+        return categories, series
+    method = "lttb" if all(x["type"] == "line" for x in series) else "minmax"
+    categories, rows = downsample(categories, {i: x["values"] for i, x in enumerate(series)}, max_points, method)
+    return categories, [{**x, "values": to_array(rows[i])} for i, x in enumerate(series)]
+
+
+def stack_series(series):
+    """
+    同一 stack 的系列累加，正负值分别累加
+    :return: 每个系列的 (起点数组, 终点数组)，空值为 nan
+    """
+    bounds, totals = [], {}
+    for item in series:
+        values = item["values"]
+        if item["stack"] is None:
+            bounds.append((np.where(np.isnan(values), np.nan, 0.0), values))
+            continue
+        pos, neg = totals.setdefault((item["type"], item["stack"]), (np.zeros(len(values)), np.zeros(len(values))))
+        positive = values >= 0
+        start = np.where(positive, pos, neg)
+        start[np.isnan(values)] = np.nan
+        end = start + values
+        pos[positive] = end[positive]
+        negative = values < 0
+        neg[negative] = end[negative]
+        bounds.append((start, end))
+    return bounds
+
+
+class SvgCanvas:
+    
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.parts = []
+    
+    @staticmethod
+    def num(value):
+        return f"{round(value, PRECISION):g}"
+    
+    def rect(self, x, y, w, h, fill):
+        n = self.num
+        self.parts.append(f'<rect x="{n(x)}" y="{n(y)}" width="{n(w)}" height="{n(h)}" fill={quoteattr(fill)}/>')
+    
+    def line(self, x1, y1, x2, y2, stroke):
+        n = self.num
+        self.parts.append(f'<line x1="{n(x1)}" y1="{n(y1)}" x2="{n(x2)}" y2="{n(y2)}" stroke="{stroke}"/>')
+    
+    def path(self, d, stroke, width=1.5):
+        self.parts.append(f'<path d="{d}" fill="none" stroke={quoteattr(stroke)} stroke-width="{width}" '
+                          f'stroke-linejoin="round"/>')
+    
+    def text(self, x, y, value, size=12, anchor="start", color=AXIS_COLOR, bold=False, baseline="middle"):
+        n = self.num
+        weight = ' font-weight="bold"' if bold else ""
+        self.parts.append(f'<text x="{n(x)}" y="{n(y)}" font-size="{size}" text-anchor="{anchor}" '
+                          f'dominant-baseline="{baseline}" fill="{color}"{weight}>{escape(str(value))}</text>')
+    
+    def to_string(self):
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                f'viewBox="0 0 {self.width} {self.height}" font-family="{FONT_FAMILY}">'
+                f'<rect width="100%" height="100%" fill="#fff"/>{"".join(self.parts)}</svg>')
+
+
+def draw_legend(canvas, series, top, font_size, max_rows=2):
+    """
+    图例在标题下方横向排列，超出 max_rows 行的不显示
+    :return: 图例占用的高度
+    """
+    row_height = font_size + 6
+    x, row = 8, 0
+    for item in series:
+        w = 14 + text_width(item["name"], font_size) + 10
+        if x + w > canvas.width - 8 and x > 8:
+            x, row = 8, row + 1
+        if row >= max_rows:
+            break
+        y = top + row * row_height + row_height / 2
+        canvas.rect(x, y - 4, 10, 8, item["color"])
+        canvas.text(x + 14, y, item["name"], font_size)
+        x += w
+    return (min(row, max_rows - 1) + 1) * row_height
+
+
+def render_svg(options, width=SVG_WIDTH, height=SVG_HEIGHT, font_size=10, legend=True):
+    """
+    支持折线图和柱状图(含堆叠、翻转)，绘制标题、图例、坐标轴和系列，时间轴图表绘制最后一个时间点
+    折线不做平滑，空值处断开
+    :param options: ECharts 配置 dict，json 格式
+    :param legend: 是否绘制图例
+    :return: svg 字符串
+    """
+    options = merge_timeline(options)
+    category_axis, categories, series = chart_series(options)
+    canvas = SvgCanvas(width, height)
+    title = _first(options.get("title")).get("text")
+    top = 6
+    if title:
+        if _first(options.get("title")).get("left") == "center":
+            canvas.text(width / 2, top + 8, title, font_size + 4, "middle", "#464646", True)
+        else:
+            canvas.text(8, top + 8, title, font_size + 4, "start", "#464646", True)
+        top += font_size + 12
+    legend_opts = _first(options.get("legend"))
+    named = [x for x in series if x["name"]]
+    if legend and named and legend_opts.get("show", True):
+        top += draw_legend(canvas, named, top, font_size)
+    
+    x_axis, y_axis = _first(options.get("xAxis")), _first(options.get("yAxis"))
+    category_opts, value_opts = (x_axis, y_axis) if category_axis == "x" else (y_axis, x_axis)
+    horizontal = category_axis == "y"
+    
+    # 值轴名称在轴的末端
+    value_name = value_opts.get("name")
+    category_name = category_opts.get("name")
+    if value_name and not horizontal:
+        top += font_size + 4
+    plot_len = (width if not horizontal else height) - 60
+    categories, series = reduce_points(categories, series, max(int(plot_len), 2))
+    bounds = stack_series(series)
+    
+    values = np.concatenate([np.concatenate(x) for x in bounds]) if bounds else np.array([])
+    values = values[~np.isnan(values)]
+    ticks = nice_ticks(min(values.min(), 0), max(values.max(), 0)) if len(values) else [0, 1]
+    tick_labels = [fmt_number(x) for x in ticks]
+    
+    # 类目轴在左侧时，左边距按类目文字宽度
+    side_labels = categories if horizontal else tick_labels
+    left = 8 + min(max([text_width(x, font_size) for x in side_labels] + [0]), width / 3) + 6
+    end_name = category_name if not horizontal else value_name
+    right = 8 + (text_width(end_name, font_size) + 6 if end_name else 0)
+    bottom = height - (font_size + 12)
+    if horizontal and category_name:
+        top += font_size + 4
+    right_edge = width - right
+    plot_w, plot_h = right_edge - left, bottom - top
+    if plot_w <= 0 or plot_h <= 0:
+        return canvas.to_string()
+    
+    lo, hi = ticks[0], ticks[-1]
+    if horizontal:
+        value_pos = lambda v: left + (v - lo) / (hi - lo) * plot_w
+        band = plot_h / max(len(categories), 1)
+        # 与 ECharts 相同，第一个类目在下方
+        category_pos = lambda i: bottom - band * (i + 0.5)
+    else:
+        value_pos = lambda v: bottom - (v - lo) / (hi - lo) * plot_h
+        band = plot_w / max(len(categories), 1)
+        category_pos = lambda i: left + band * (i + 0.5)
+    
+    # 分隔线和值轴标签
+    for tick, label in zip(ticks, tick_labels):
+        p = value_pos(tick)
+        if horizontal:
+            canvas.line(p, top, p, bottom, SPLIT_COLOR)
+            canvas.text(p, bottom + 4, label, font_size, "middle", baseline="hanging")
+        else:
+            canvas.line(left, p, right_edge, p, SPLIT_COLOR)
+            canvas.text(left - 6, p, label, font_size, "end")
+    
+    # 类目轴和标签，标签重叠时按间隔显示
+    zero = value_pos(min(max(0, lo), hi))
+    if horizontal:
+        canvas.line(zero, top, zero, bottom, AXIS_COLOR)
+        interval = max(1, math.ceil((font_size + 2) / band))
+    else:
+        canvas.line(left, zero, right_edge, zero, AXIS_COLOR)
+        label_width = max([text_width(x, font_size) for x in categories] + [1]) + 6
+        interval = max(1, math.ceil(label_width / band))
+    for i in range(0, len(categories), interval):
+        if horizontal:
+            canvas.text(left - 6, category_pos(i), categories[i], font_size, "end")
+        else:
+            canvas.text(category_pos(i), bottom + 4, categories[i], font_size, "middle", baseline="hanging")
+    
+    if value_name:
+        if horizontal:
+            canvas.text(right_edge + 4, bottom, value_name, font_size)
+        else:
+            canvas.text(left, top - font_size / 2 - 4, value_name, font_size, "middle")
+    if category_name:
+        if horizontal:
+            canvas.text(left, top - font_size / 2 - 4, category_name, font_size, "middle")
+        else:
+            canvas.text(right_edge + 4, bottom, category_name, font_size)
+    
+    # 柱子按 stack 分组，同组共用一个位置
+    groups = []
+    for item in series:
+        if item["type"] == "bar":
+            key = item["stack"] if item["stack"] is not None else id(item)
+            if key not in groups:
+                groups.append(key)
+    bar_width = band * 0.8 / max(len(groups), 1)
+    
+    centers = category_pos(np.arange(len(categories)))
+    for item, (start, end) in zip(series, bounds):
+        if item["type"] == "bar":
+            key = item["stack"] if item["stack"] is not None else id(item)
+            offset = -band * 0.4 + bar_width * groups.index(key)
+            colors = item["item_colors"] or []
+            p0, p1 = value_pos(start), value_pos(end)
+            for i in np.flatnonzero(~np.isnan(end)).tolist():
+                a, b = sorted([p0[i], p1[i]])
+                c = centers[i] + offset
+                color = (colors[i] if i < len(colors) else None) or item["color"]
+                if horizontal:
+                    canvas.rect(a, c, b - a, bar_width * 0.9, color)
+                else:
+                    canvas.rect(c, a, bar_width * 0.9, b - a, color)
+        else:
+            xs, ys = centers, value_pos(end)
+            if horizontal:
+                xs, ys = ys, xs
+            d, pen = [], "M"
+            for x, y in zip(xs.round(PRECISION).tolist(), ys.round(PRECISION).tolist()):
+                if x != x or y != y:
+                    # 不连接空数据
+                    pen = "M"
+                    continue
+                d.append(f"{pen}{x:g} {y:g}")
+                pen = "L"
+            if d:
+                canvas.path("".join(d), item["color"])
+    return canvas.to_string()
+
+
+def chart_svg(graph, width=SVG_WIDTH, height=SVG_HEIGHT, **kwargs):
+    """
+    :param graph: draw_line / draw_bar 返回的图表
+    """
+    return render_svg(json.loads(graph.dump_options_with_quotes()), width, height, **kwargs)
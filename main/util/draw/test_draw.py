@@ -5,14 +5,31 @@
 # @Author : wuyazibest
 # @Email  : wuyazibest@163.com
 # @Desc   :
+import gzip
+import json
 import os
+from xml.etree import ElementTree
 
+import flask
 import pytest
 import numpy as np
 import pandas as pd
 
-from main.config import BASE_DIR
-from main.util.draw import draw_bar, draw_line, draw_timeline
+from main.util.draw import draw_bar, draw_line, draw_timeline, draw_frame, frame_series
+from main.util.draw.downsample import downsample, lttb, minmax
+from main.util.artifact_cache import ArtifactCache
+from main.util.draw.render import render_chart, chart_response
+from main.util.draw import executor as executor_module
+from main.util.draw.executor import RenderExecutor
+from main.util.draw.svg import chart_svg, nice_ticks
+from main.util.draw import base
+
+
+@pytest.fixture(autouse=True)
+def dist_path(tmp_path, monkeypatch):
+    # 图表文件写入临时目录，不写入仓库的 dist
+    monkeypatch.setattr(base, "BASE_DIR", str(tmp_path))
+    return os.path.join(str(tmp_path), "dist")
 
 
 def setup_module(module):
@@ -113,22 +130,152 @@ class TestDraw(object):
         cls.df = df
     
     # @pytest.mark.skip()
-    def test_draw_bar(self):
+    def test_draw_bar(self, dist_path):
         draw_bar(self.df.index.values.tolist(), self.df.to_dict("list"), **self.title)
-        path = os.path.join(BASE_DIR, "dist", "bar.html")
+        path = os.path.join(dist_path, "bar.html")
         assert os.path.exists(path) is True
     
     # @pytest.mark.skip()
-    def test_draw_line(self):
+    def test_draw_line(self, dist_path):
         draw_line(self.df.index.values.tolist(), self.df.to_dict("list"), **self.title)
-        path = os.path.join(BASE_DIR, "dist", "line.html")
+        path = os.path.join(dist_path, "line.html")
         assert os.path.exists(path) is True
     
     # @pytest.mark.skip()
-    def test_draw_timeline(self):
-        draw_timeline(self.df.to_dict("index"), **self.title)
-        path = os.path.join(BASE_DIR, "dist", "timeline.html")
+    def test_draw_timeline(self, dist_path):
+        timeline = draw_timeline(self.df.to_dict("index"), **self.title)
+        path = os.path.join(dist_path, "timeline.html")
         assert os.path.exists(path) is True
+        # 每个时间点只有类目和数据，标题等只在 baseOption 中
+        options = timeline.get_options()
+        assert len(options["options"]) == len(self.df)
+        assert set(options["options"][0]) == {"yAxis", "series"}
+        assert options["baseOption"]["title"] and "data" not in options["baseOption"]["series"][0]
+        assert options["options"][0]["yAxis"][0]["data"][-1] == self.df.iloc[0].idxmax()
+    
+    def test_draw_frame(self, dist_path):
+        xaxis, row_dict = frame_series(self.df)
+        assert xaxis == self.df.index.tolist()
+        assert row_dict["C"] == self.df["C"].tolist()
+        graph = draw_frame(self.df, "line", path="line_frame.html", **self.title)
+        # nan 输出为 null
+        assert '"Visual Basic"' in graph.dump_options() and "NaN" not in graph.dump_options()
+        draw_frame(self.df.to_numpy(), "bar", columns=self.df.columns, path="bar_frame.html", **self.title)
+        draw_frame(self.df, "timeline", path="timeline_frame.html", **self.title)
+        for x in ["line_frame.html", "bar_frame.html", "timeline_frame.html"]:
+            assert os.path.exists(os.path.join(dist_path, x)) is True
+    
+    def test_draw_dataset(self):
+        xaxis, row_dict = frame_series(self.df)
+        graph = draw_line(xaxis, row_dict, path="line_frame.html", dataset=True, **self.title)
+        options = graph.get_options()
+        # x轴只在 dataset 中输出一次
+        assert graph.dump_options().count(xaxis[0]) == 1
+        assert options["dataset"]["source"][0][1:] == [row[0] for row in row_dict.values()]
+        assert options["series"][1]["encode"] == {"x": 0, "y": 2}
+        graph = draw_bar(xaxis, row_dict, path="bar_frame.html", dataset=True, **self.title)
+        assert graph.dump_options().count(xaxis[0]) == 1
+    
+    def test_render_chart(self, tmp_path, fake_redis, monkeypatch):
+        cache = ArtifactCache(str(tmp_path))
+        key = cache.key("line", {"b": 1, "a": 2})
+        assert key == cache.key("line", {"a": 2, "b": 1})
+        xaxis, row_dict = frame_series(self.df)
+        draw_fn = lambda: draw_line(xaxis, row_dict, path=None, **self.title)
+        html = render_chart(key, draw_fn, cache, persist=False)
+        assert "echarts.init" in html and not cache.exists(key)
+        cache.put(key, html)
+        # 已存在时不再生成
+        assert render_chart(key, lambda: 1 / 0, cache) is None
+        # 返回前已写入缓存，等锁的进程不会再生成
+        key2 = cache.key("line", {"sync": True})
+        assert "echarts.init" in render_chart(key2, draw_fn, cache) and cache.exists(key2)
+        
+        app = flask.Flask(__name__)
+        with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+            resp = chart_response(key, lambda: 1 / 0, cache)
+            resp.direct_passthrough = False
+            assert resp.headers["Content-Encoding"] == "gzip" and resp.get_etag() == (key, False)
+            assert gzip.decompress(resp.get_data()).decode("utf-8") == html
+        # 选择文件后被淘汰时重新生成
+        with app.test_request_context(), monkeypatch.context() as m:
+            m.setattr(cache, "select", lambda *args: (cache.file_path("evicted"), None))
+            assert "echarts.init" in chart_response(key, draw_fn, cache).get_data(as_text=True)
+        with app.test_request_context(headers={"If-None-Match": cache.etag(key)}):
+            assert chart_response(key, lambda: 1 / 0, cache).status_code == 304
+        # 数据不完整时不缓存，也不返回 ETag
+        key = cache.key("line", {"partial": True})
+        with app.test_request_context():
+            resp = chart_response(key, draw_fn, cache, persist=lambda: False)
+            assert resp.get_etag() == (None, None) and resp.headers["Cache-Control"] == "no-store"
+            assert not cache.exists(key)
+        
+        option_cache = ArtifactCache(str(tmp_path), suffix=".json")
+        key = option_cache.key("line", {"b": 1, "a": 2, "format": "option"})
+        option = render_chart(key, draw_fn, option_cache, persist=False, fmt="option")
+        assert json.loads(option)["series"][0]["name"] == list(row_dict)[0]
+    
+    def test_render_executor(self, monkeypatch):
+        xaxis, row_dict = frame_series(self.df)
+        tasks = [(draw_line, (xaxis, row_dict), {**self.title, "path": None, "max_points": x}) for x in [5, 10]]
+        executor = RenderExecutor(max_workers=2)
+        try:
+            charts = executor.map(tasks)
+            # 子进程中序列化的配置与当前进程相同
+            assert [x.json_contents for x in charts] == [draw_line(*x[1], **x[2]).dump_options() for x in tasks]
+            page = executor.page(tasks)
+            html = page.render_embed()
+            assert all([x.chart_id in html and x.json_contents in html for x in page])
+        finally:
+            executor.shutdown()
+        
+        # 默认不使用进程池，进程数不超过cpu数量
+        assert RenderExecutor(max_workers=0).inline(tasks)
+        assert RenderExecutor(max_workers=10 ** 4).max_workers == os.cpu_count()
+        executor = RenderExecutor(max_workers=2)
+        monkeypatch.setattr(executor_module.sys, "executable", "/usr/local/bin/uwsgi")
+        assert executor.inline(tasks) and executor._pool is None
+        assert [x.json_contents for x in executor.map(tasks)] == [x.json_contents for x in charts]
+    
+    def test_svg(self):
+        assert nice_ticks(0, 26.49) == [0, 10, 20, 30]
+        assert nice_ticks(-3, 7) == [-4, -2, 0, 2, 4, 6, 8]
+        xaxis, row_dict = frame_series(self.df)
+        for fn in [draw_line, draw_bar]:
+            for dataset in [False, True]:
+                svg = chart_svg(fn(xaxis, row_dict, path=None, dataset=dataset, **self.title))
+                root = ElementTree.fromstring(svg)
+                texts = [x.text for x in root.iter("{http://www.w3.org/2000/svg}text")]
+                assert self.title["title"] in texts and "Java" in texts
+                if fn is draw_line:
+                    # 全为空的列没有折线
+                    assert len(root.findall("{http://www.w3.org/2000/svg}path")) == len(row_dict) - 2
+        svg = chart_svg(draw_timeline(self.df.to_dict("index"), path=None, **self.title))
+        assert f"{self.title['title']} {self.df.index[-1]}" in svg
+    
+    def test_downsample(self):
+        y = np.sin(np.linspace(0, 20, 5000))
+        y[1234] = 5
+        index = lttb(y, 200)
+        assert len(index) == 200 and index[0] == 0 and index[-1] == 4999
+        assert 1234 in index
+        index = minmax(y, 200)
+        assert len(index) <= 200 and 1234 in index
+        
+        xaxis = [str(x) for x in range(5000)]
+        row_dict = {"a": y.tolist(), "b": [None] * 2500 + y[2500:].tolist()}
+        xaxis, row_dict = downsample(xaxis, row_dict, 300)
+        assert len(xaxis) <= 300
+        assert len(row_dict["a"]) == len(row_dict["b"]) == len(xaxis)
+        assert row_dict["a"][xaxis.index("1234")] == 5
+        
+        # 列数超过 max_points / 3 时各列预算之和超过 max_points
+        rows = np.random.RandomState(0).randn(5000, 20).cumsum(axis=0)
+        xaxis = [str(x) for x in range(5000)]
+        for max_points, method in [(30, "minmax"), (15, "lttb")]:
+            x, row_dict = downsample(xaxis, {i: rows[:, i] for i in range(20)}, max_points, method)
+            assert len(x) == max_points and x[0] == "0" and x[-1] == "4999"
+            assert all(len(v) == max_points for v in row_dict.values())
 
 
 if __name__ == '__main__':
@@ -8,9 +8,12 @@
 
 from pyecharts import options as opts
 
-from .bar import draw_single_bar
+from .bar import draw_single_bar, bar_colors, sort_bar_data
 from .base import base_colors, chart_lib, fmt_file_path
 
+# 所有时间点相同的组件，只在 baseOption 中输出一次
+SHARED_COMPONENTS = ["backgroundColor", "title", "tooltip", "legend", "color", "grid", "xAxis", "yAxis", "series"]
+
 
 def draw_timeline(
         df_dict,
@@ -18,8 +21,11 @@ def draw_timeline(
         title=None,
         xaxis_name=None,
         yaxis_name=None,
+        colors=None,
+        max_columns=None,
         ):
     """
+    公共组件放在 baseOption，每个时间点只输出排序后的类目和数据
     
     :param df_dict:
     {
@@ -34,17 +40,38 @@ def draw_timeline(
     '2002-02-27': {'Assembly language': None, 'C': 19.89, 'C#': 0.74, 'C++': 15.54, 'Java': 24.01, 'JavaScript': 1.48, 'PHP': 7.44, 'Python': 0.99, 'SQL': 2.09, 'Visual Basic': None},
     '2002-03-29': {'Assembly language': None, 'C': 19.85, 'C#': 0.74, 'C++': 15.91, 'Java': 24.41, 'JavaScript': 1.47, 'PHP': 7.03, 'Python': 0.99, 'SQL': 2.06, 'Visual Basic': None}
     }
-    :param path:
+    :param path: 为空时不写文件，由调用方 render_embed
     :param title:
     :param xaxis_name:
     :param yaxis_name:
+    :param colors:
+    :param max_columns: 每个时间点最多显示的柱子数
     :return:
     """
     timeline = chart_lib("timeline")
+    time_points = [str(x) for x in df_dict]
+    if not time_points:
+        if path:
+            timeline.render(fmt_file_path(path))
+        return timeline
+    
+    frames = list(df_dict.values())
+    # 颜色跟随列名，所有时间点的列的并集
+    data_colors = bar_colors(dict.fromkeys(k for frame in frames for k in frame), colors)
+    # 第一个时间点的图表作为模板，提供 js 依赖和公共组件
+    template = draw_single_bar(frames[0], colors=colors, reversal_axis=True, title=title,
+                               xaxis_name=xaxis_name, yaxis_name=yaxis_name, max_columns=max_columns)
+    timeline.add(template, time_point=time_points[0])
     
-    for date in df_dict:
-        timeline.add(draw_single_bar(df_dict[date], reversal_axis=True, title=title, xaxis_name=xaxis_name, yaxis_name=yaxis_name),
-                     time_point=str(date))
+    base = timeline.options["baseOption"]
+    for key in SHARED_COMPONENTS:
+        if template.options.get(key) is not None:
+            base[key] = template.options[key]
+    # 类目和数据由每个时间点提供
+    base["yAxis"] = [{**base["yAxis"][0], "data": None}, *base["yAxis"][1:]]
+    base["series"] = [{**base["series"][0], "data": None}]
+    base["timeline"].update(data=time_points)
+    timeline.options["options"] = [timeline_frame(x, data_colors, max_columns) for x in frames]
     
     timeline.add_schema(
         # axis_type="time",  # time,value
@@ -55,4 +82,21 @@ def draw_timeline(
         linestyle_opts=opts.LineStyleOpts(width=3),
         # label_opts=opts.LabelOpts(interval=5),
         )
-    timeline.render(fmt_file_path(path))
+    if path:
+        timeline.render(fmt_file_path(path))
+    return timeline
+
+
+def timeline_frame(data_dict, data_colors, max_columns=None):
+    """
+    单个时间点的增量配置，与 baseOption 按组件下标合并
+    """
+    data_dict = sort_bar_data(data_dict, max_columns)
+    return {
+        "yAxis" : [{"data": list(data_dict)}],
+        "series": [{"data": [
+            # nan 与 None 相同，不输出数值
+            {"value": None if v is None or v != v else v, "itemStyle": {"color": data_colors.get(k)}}
+            for k, v in data_dict.items()
+            ]}],
+        }
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : http_pool.py
+# @Time   : 2026/10/18 14:05
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 按域名复用的长连接会话池
+import collections
+import http.cookiejar
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from main.config import DataDict
+
+logger = logging.getLogger(__name__)
+
+"""
+pool_size       每个域名的连接池大小
+keep_alive      是否保持长连接
+connect_timeout 建立连接超时时间 秒
+read_timeout    读取超时时间 秒
+max_retry       最大尝试次数
+backoff         重试等待基数 秒，第n次重试等待 backoff * 2^n 秒
+backoff_max     重试最长等待时间 秒
+jitter          重试等待的随机抖动上限 秒
+"""
+HTTP_POOL_CONF = {
+    "default"              : dict(pool_size=10, keep_alive=True, connect_timeout=3.05, read_timeout=10,
+                                  max_retry=2, backoff=0.2, backoff_max=2, jitter=0.2),
+    # 腾讯股票
+    "web.ifzq.gtimg.cn"    : dict(pool_size=20, connect_timeout=3.05, read_timeout=5),
+    # 凤凰网股票 返回全部历史数据
+    "api.finance.ifeng.com": dict(pool_size=20, connect_timeout=3.05, read_timeout=10),
+    # 新浪实时行情 一次请求多只股票
+    "hq.sinajs.cn"         : dict(pool_size=10, connect_timeout=3.05, read_timeout=5),
+    # 国家海洋科学数据中心 潮汐
+    "mds.nmdis.org.cn"     : dict(pool_size=10, connect_timeout=3.05, read_timeout=10, max_retry=3),
+    # tiobe 页面较大，定时任务使用
+    "www.tiobe.com"        : dict(pool_size=1, keep_alive=False, connect_timeout=5, read_timeout=30,
+                                  max_retry=3, backoff=1, backoff_max=10, jitter=1),
+    }
+
+
+class _StatMixin:
+    """
+    统计连接复用情况，从连接池中取连接记为一次请求，需要重新建立连接的记为一次未命中
+    """
+    
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        # 新建的连接和已断开的连接都没有socket，发请求时才会建立连接
+        http_pool.incr(self.host, "requests")
+        if getattr(conn, "sock", None) is None:
+            http_pool.incr(self.host, "miss")
+        return conn
+
+
+class _HTTPConnectionPool(_StatMixin, HTTPConnectionPool): pass
+
+
+class _HTTPSConnectionPool(_StatMixin, HTTPSConnectionPool): pass
+
+
+class PoolAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
+
+
+class HttpPool:
+    def __init__(self, pool_conf=None):
+        self.pool_conf = pool_conf or HTTP_POOL_CONF
+        self._sessions = {}
+        self._counter = collections.defaultdict(collections.Counter)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+    
+    @staticmethod
+    def get_host(url):
+        return urlsplit(url).hostname or ""
+    
+    def get_conf(self, url):
+        conf = DataDict(self.pool_conf["default"])
+        conf.update(self.pool_conf.get(self.get_host(url), {}))
+        return conf
+    
+    def retry_kwargs(self, url, max_retry=None):
+        """
+        retrying 的参数，指数退避加随机抖动
+        """
+        conf = self.get_conf(url)
+        return dict(stop_max_attempt_number=max_retry or conf.max_retry,
+                    wait_exponential_multiplier=conf.backoff * 1000,
+                    wait_exponential_max=conf.backoff_max * 1000,
+                    wait_jitter_max=conf.jitter * 1000)
+    
+    def timeout(self, url):
+        conf = self.get_conf(url)
+        return conf.connect_timeout, conf.read_timeout
+    
+    def session(self, url):
+        host = self.get_host(url)
+        with self._lock:
+            # fork 出的子进程不能复用父进程的连接
+            if self._pid != os.getpid():
+                self._sessions, self._pid = {}, os.getpid()
+                self._counter.clear()
+            
+            if host not in self._sessions:
+                conf = self.get_conf(url)
+                session = requests.Session()
+                # 只复用连接，不保存响应的 cookie，不同调用方之间互不影响
+                session.cookies = RequestsCookieJar(policy=http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                adapter = PoolAdapter(pool_connections=1, pool_maxsize=conf.pool_size, pool_block=False)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if not conf.keep_alive:
+                    session.headers["Connection"] = "close"
+                self._sessions[host] = session
+        
+        return self._sessions[host]
+    
+    def incr(self, host, key, amount=1):
+        with self._lock:
+            self._counter[host][key] += amount
+    
+    def stats(self):
+        """
+        :return:
+        {
+            "web.ifzq.gtimg.cn": {"requests": 30, "hit": 28, "miss": 2},
+        }
+        """
+        with self._lock:
+            return {
+                host: {"requests": v["requests"], "hit": v["requests"] - v["miss"], "miss": v["miss"]}
+                for host, v in self._counter.items()
+                }
+    
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+http_pool = HttpPool()
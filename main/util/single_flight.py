@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : single_flight.py
+# @Time   : 2026/10/18 19:40
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   : 跨进程的单飞锁，相同的图表只由一个进程生成，其他进程等待结果
+import logging
+
+from redis.exceptions import RedisError, LockError
+
+from main.util.db import redis_store
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_PREFIX = "single_flight:"
+# 锁的过期时间，生成进程异常退出时自动释放 秒
+LOCK_TIMEOUT = 120
+# 等待其他进程生成的最长时间，超时后自己生成 秒
+WAIT_TIMEOUT = 60
+
+
+def single_flight(key, exists_fn, build_fn, lock_timeout=LOCK_TIMEOUT, wait_timeout=WAIT_TIMEOUT):
+    """
+    结果不存在时加锁生成，拿到锁后再检查一次，已被其他进程生成时直接返回
+    redis 不可用或等待超时时直接生成，不影响请求
+    :param key: 缓存key，如图表文件名
+    :param exists_fn: exists_fn() 结果是否已存在
+    :param build_fn: build_fn() 生成结果
+    :return: 是否由当前进程生成
+    """
+    if exists_fn():
+        return False
+    
+    lock = redis_store.lock(SINGLE_FLIGHT_PREFIX + key, timeout=lock_timeout, sleep=0.1, blocking_timeout=wait_timeout)
+    try:
+        acquired = lock.acquire() if lock is not None else False
+    except RedisError as e:
+        logger.error(f"获取单飞锁失败 {key} error:{e}")
+        lock, acquired = None, False
+    
+    if not acquired:
+        if lock is not None:
+            logger.warning(f"等待单飞锁超时 {key}")
+        if exists_fn():
+            return False
+        build_fn()
+        return True
+    
+    try:
+        if exists_fn():
+            return False
+        build_fn()
+        return True
+    finally:
+        try:
+            lock.release()
+        except (RedisError, LockError) as e:
+            # 生成时间超过 lock_timeout 时锁已过期
+            logger.warning(f"释放单飞锁失败 {key} error:{e}")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_artifact_cache.py
+# @Time   : 2026/10/18 22:40
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import os
+import time
+
+import pytest
+
+from main.util.artifact_cache import ArtifactCache
+
+
+def test_evict(tmp_path, fake_redis):
+    cache = ArtifactCache(str(tmp_path), budget=10 ** 9)
+    for i in range(5):
+        cache.put(f"chart_{i}", os.urandom(1000))
+        # 没有访问记录时按文件修改时间淘汰
+        fake_redis.delete(f"artifact:chart_{i}")
+        os.utime(cache.file_path(f"chart_{i}"), (time.time() - 100 + i, time.time() - 100 + i))
+    
+    size = sum(x["size"] for x in cache.scan().values())
+    assert cache.evict(budget=size * 3 // 5) == 3
+    assert sorted(cache.scan()) == ["chart_3", "chart_4"]
+    assert not os.path.exists(cache.file_path("chart_0", "gzip"))
+    assert cache.select("chart_4", ["gzip"]) == (cache.file_path("chart_4", "gzip"), "gzip")
+    assert cache.select("chart_0") == (None, None)
+    assert int(fake_redis.get(cache.bytes_key)) == size * 2 // 5
+
+
+def test_bytes_counter(tmp_path, fake_redis):
+    cache = ArtifactCache(str(tmp_path / "a"), budget=10 ** 9)
+    other = ArtifactCache(str(tmp_path / "b"), budget=10 ** 9)
+    size = cache.put("chart", os.urandom(1000))
+    # 覆盖同一个key不重复计数
+    assert cache.put("chart", os.urandom(1000)) == size
+    assert int(fake_redis.get(cache.bytes_key)) == size
+    # 其他目录的实例不影响计数
+    other.evict()
+    assert other.bytes_key != cache.bytes_key
+    assert int(fake_redis.get(cache.bytes_key)) == size
+    assert ArtifactCache(str(tmp_path / "a"), suffix=".json").bytes_key == cache.bytes_key
+    
+    # 超出上限时写入不淘汰，由定时任务淘汰
+    cache.budget = 1
+    cache.put("chart_2", os.urandom(1000))
+    assert sorted(cache.scan()) == ["chart", "chart_2"]
+    assert cache.evict() == 2
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_async_http.py
+# @Time   : 2026/10/19 11:00
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import asyncio
+import sys
+import types
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from main.util.async_http import run_sync, gevent_patched
+
+
+async def current_loop():
+    return asyncio.get_event_loop()
+
+
+class TestAsyncHttp(object):
+    def test_run_sync(self):
+        # 多次调用使用同一个事件循环，会话可以复用
+        loop = run_sync(current_loop())
+        assert run_sync(current_loop()) is loop and loop.is_running()
+        
+        async def nested():
+            return run_sync(current_loop())
+        
+        with pytest.raises(RuntimeError):
+            run_sync(nested())
+    
+    def test_run_sync_timeout(self):
+        cancelled = []
+        
+        async def stuck():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        
+        with pytest.raises(FutureTimeoutError):
+            run_sync(stuck(), timeout=0.1)
+        # 超时后协程被取消，不会一直占用事件循环
+        run_sync(asyncio.sleep(0.1))
+        assert cancelled == [True]
+    
+    def test_gevent(self, monkeypatch):
+        monkey = types.SimpleNamespace(is_module_patched=lambda name: name == "threading")
+        monkeypatch.setitem(sys.modules, "gevent.monkey", monkey)
+        assert gevent_patched()
+        with pytest.raises(RuntimeError):
+            run_sync(current_loop())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_http_pool.py
+# @Time   : 2026/10/19 16:40
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from main.util.http_pool import HttpPool
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        body = (self.headers.get("Cookie") or "").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    server = HTTPServer(("127.0.0.1", 0), CookieHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpPool(object):
+    def test_no_cookies(self, server):
+        pool = HttpPool()
+        try:
+            session = pool.session(server)
+            assert session.get(server).text == ""
+            # 响应的 cookie 不会带到下一次请求，显式传入的仍然发送
+            assert session.get(server).text == "" and not session.cookies
+            assert session.get(server, cookies={"token": "1"}).text == "token=1"
+            assert pool.session(server) is session
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    pytest.main()
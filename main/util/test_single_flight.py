@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @File   : test_single_flight.py
+# @Time   : 2026/10/19 12:30
+# @Author : wuyazibest
+# @Email  : wuyazibest@163.com
+# @Desc   :
+import pytest
+
+from main.util import single_flight as module
+from main.util.single_flight import single_flight
+
+
+class FakeLock:
+    def __init__(self, acquired, on_acquire=None):
+        self.acquired = acquired
+        self.on_acquire = on_acquire
+        self.released = False
+    
+    def acquire(self):
+        if self.on_acquire:
+            self.on_acquire()
+        return self.acquired
+    
+    def release(self):
+        self.released = True
+
+
+class FakeStore:
+    def __init__(self, lock):
+        self._lock = lock
+        self.calls = 0
+    
+    def lock(self, name, **kwargs):
+        self.calls += 1
+        return self._lock
+
+
+@pytest.fixture()
+def state():
+    return {"exists": False, "builds": 0}
+
+
+def exists_fn(state):
+    return lambda: state["exists"]
+
+
+def build_fn(state):
+    def build():
+        state["builds"] += 1
+        state["exists"] = True
+    
+    return build
+
+
+class TestSingleFlight(object):
+    def test_exists(self, monkeypatch, state):
+        store = FakeStore(FakeLock(True))
+        monkeypatch.setattr(module, "redis_store", store)
+        state["exists"] = True
+        assert single_flight("k", exists_fn(state), build_fn(state)) is False
+        # 已存在时不加锁
+        assert store.calls == 0 and state["builds"] == 0
+    
+    def test_built_while_waiting(self, monkeypatch, state):
+        # 等锁期间其他进程已生成，拿到锁后再检查一次
+        lock = FakeLock(True, on_acquire=lambda: state.update(exists=True))
+        monkeypatch.setattr(module, "redis_store", FakeStore(lock))
+        assert single_flight("k", exists_fn(state), build_fn(state)) is False
+        assert state["builds"] == 0 and lock.released
+        
+        state["exists"] = False
+        lock = FakeLock(True)
+        monkeypatch.setattr(module, "redis_store", FakeStore(lock))
+        assert single_flight("k", exists_fn(state), build_fn(state)) is True
+        assert state["builds"] == 1 and lock.released
+    
+    def test_wait_timeout(self, monkeypatch, state):
+        lock = FakeLock(False)
+        monkeypatch.setattr(module, "redis_store", FakeStore(lock))
+        # 超时后自己生成
+        assert single_flight("k", exists_fn(state), build_fn(state)) is True
+        assert state["builds"] == 1 and not lock.released
+        # 超时时已被生成则不再生成
+        state["exists"] = False
+        lock.on_acquire = lambda: state.update(exists=True)
+        assert single_flight("k", exists_fn(state), build_fn(state)) is False
+        assert state["builds"] == 1